@@ -1,16 +1,28 @@
 # app_streamlit.py
 import streamlit as st
 import importlib
+import importlib.util
 import inspect
 import pandas as pd
 import io
 import os
-import re
+import json
+import hashlib
 import subprocess
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 
+from http_client import HttpClient
+from scrape_cache import ScrapeCache
+from sheet_mirror import SheetMirror, sheet_key
+from scrape_core import ScrapeCore, InstagramSource, dataframe_rows, detect_columns
+from profile_urls import dedup_ratio
+import lead_io
+import pec_output
+import scrape_worker
+import pec_render
+import jobs
+from sheets_batch import SheetsBatchWriter, DEFAULT_BATCH_SIZE
+
 st.set_page_config(page_title="PEC + Email Finder — Streamlit UI", layout="wide")
 st.title("PEC Bulk Generator & Email Finder — Streamlit UI")
 
@@ -43,28 +55,203 @@ if not selenium_script_present:
     st.info(f"Selenium FB script `{SELENIUM_SCRIPT_NAME}` not found in project root. To enable FB scraping, place your script in the same folder and name it `{SELENIUM_SCRIPT_NAME}` (or edit this file).")
 
 # ------------------------------------------------------------
-# Helper functions for email extraction (same logic as your script)
+# Helpers for email scraping (shared with the CLI, see scrape_core.py)
+# ------------------------------------------------------------
+@st.cache_resource
+def get_scrape_cache():
+    """One persistent scrape cache per server process (survives script reruns)."""
+    return ScrapeCache()
+
+@st.cache_resource
+def get_worker_queue():
+    """Job queue of scrape_worker.py (the worker runs as a separate process)."""
+    return scrape_worker.JobQueue()
+
+@st.cache_resource
+def get_http_client():
+    """Pooled keep-alive HTTP session shared across reruns."""
+    return HttpClient()
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+# ------------------------------------------------------------
+# Cached loaders. Streamlit reruns the whole script on every widget interaction, so
+# parsing, rendering, scraping and Sheets access are memoised on content hashes.
+# Arguments starting with "_" are not hashed (the hash argument stands in for them).
 # ------------------------------------------------------------
-EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
-
-def extract_emails(text):
-    if not isinstance(text, str):
-        return []
-    return EMAIL_RE.findall(text)
-
-def scrape_instagram_bio(url):
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=10)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        bio_tag = soup.find("meta", property="og:description")
-        if bio_tag and bio_tag.get("content"):
-            return list(set(extract_emails(bio_tag["content"])))
-        return []
-    except Exception as e:
-        st.warning(f"IG scrape error for {url}: {e}")
-        return []
+DEFAULT_IG_CONCURRENCY = 4
+
+SHEETS_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def parse_lead_upload(upload_hash, file_name, _data):
+    """Uploaded lead file as a DataFrame; CSV, Parquet or Feather by file extension."""
+    return lead_io.read_leads(io.BytesIO(_data), fmt=lead_io.lead_format(file_name))
+
+def lead_download(label, df, base_name, key):
+    """Download button for df in the format picked next to it (CSV, Parquet or Feather)."""
+    fmt = st.selectbox("Download format", list(lead_io.EXTENSIONS), key=f"{key}_format")
+    st.download_button(label, data=lead_io.to_bytes(df, fmt), file_name=f"{base_name}.{lead_io.EXTENSIONS[fmt]}",
+                       mime=lead_io.MIME_TYPES[fmt], key=key)
+
+def missing_sheets_libraries():
+    """Sheets client packages that are not installed (checked without importing them)."""
+    return [name for name in ("gspread", "oauth2client") if importlib.util.find_spec(name) is None]
+
+@st.cache_resource(show_spinner=False)
+def get_gspread_client(key_hash, _key_bytes):
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(json.loads(_key_bytes), SHEETS_SCOPE)
+    return gspread.authorize(creds)
+
+@st.cache_resource(show_spinner=False)
+def open_spreadsheet(key_hash, sheet_name, _client):
+    return _client.open(sheet_name)
+
+@st.cache_resource(show_spinner=False)
+def open_worksheet(key_hash, sheet_name, ws_name, _sh):
+    return _sh.worksheet(ws_name)
+
+@st.cache_resource
+def get_sheet_mirror():
+    """Local copy of the worksheets we read; a sync only downloads changed rows (see sheet_mirror.py)."""
+    return SheetMirror()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def read_worksheet_values(key_hash, sheet_name, ws_name, _ws):
+    """All values of a worksheet from the local mirror, synced at most every 5 minutes (and after our own writes)."""
+    values, _ = get_sheet_mirror().read(_ws)
+    return values
+
+# ------------------------------------------------------------
+# Background jobs: IG scraping and Sheets write-back run on worker threads that
+# survive reruns; the session keeps the ids of the jobs it started.
+# ------------------------------------------------------------
+@st.cache_resource
+def get_job_registry():
+    return jobs.JobRegistry()
+
+def remember_job(job):
+    ids = st.session_state.setdefault("job_ids", [])
+    if job.id not in ids:
+        ids.append(job.id)
+    return job
+
+def start_ig_job(source_hash, df, email_col, ig_col, concurrency=DEFAULT_IG_CONCURRENCY):
+    """
+    Start (or reuse) the IG scrape job for this input. Finished jobs for the same input hash
+    and columns are reused, so repeat clicks and reruns do not scrape again.
+    Rows go through the same ScrapeCore as the CLI: `concurrency` profiles are fetched at once
+    and each canonical profile is scraped once per job.
+    """
+    registry = get_job_registry()
+    key = f"ig:{source_hash}:{email_col}:{ig_col}"
+    job = registry.find(key)
+    if job is not None and job.status != "failed":
+        job.resume()  # no-op unless it was cancelled or is being cancelled
+        return remember_job(job)
+
+    items = dataframe_rows(df, email_col, {"ig": ig_col})
+    source = InstagramSource(client=get_http_client())
+    core = ScrapeCore([source], concurrency=concurrency, cache=get_scrape_cache())
+
+    def scrape_batch(batch, log):
+        source.warn = log
+        results, stats = core.run(batch, on_error=log)
+        for k in ("profile_lookups", "unique_profiles", "cache_hits", "cache_misses"):
+            job.meta[k] = job.meta.get(k, 0) + stats.get(k, 0)
+        job.meta["dedup_ratio"] = dedup_ratio(job.meta.get("profile_lookups", 0), job.meta.get("unique_profiles", 0))
+        return [email for _, email, _ in results]
+
+    # a few batches' worth of rows per call keeps every worker busy between progress updates
+    job = jobs.Job("IG scrape", items, scrape_batch, batch_size=concurrency * 4, key=key)
+    registry.add(job)
+    job.start()
+    return remember_job(job)
+
+def start_sheets_write_job(label, ws, entries, batch_size, cells=True, on_done=None):
+    """Write entries to ws in the background: (row, col, value) cells, or whole rows to append."""
+    mirror = get_sheet_mirror()
+
+    def write_batch(batch, log):
+        writer = SheetsBatchWriter(batch_size=len(batch))
+        try:
+            for entry in batch:
+                if cells:
+                    writer.update_cell(ws, *entry)
+                else:
+                    writer.append_row(ws, entry)
+            writer.flush()
+        except Exception:
+            mirror.invalidate(sheet_key(ws))
+            raise
+        if cells:
+            mirror.set_cells(sheet_key(ws), batch)   # no-op for worksheets that are not mirrored
+        return [True] * len(batch)
+
+    job = jobs.Job(label, entries, write_batch, batch_size=batch_size, on_done=on_done)
+    get_job_registry().add(job)
+    job.start()
+    return remember_job(job)
+
+def ig_results_frame(job, df, email_col):
+    """df with the (possibly partial) IG job results; rows not reached yet stay empty."""
+    results = list(job.results) + [""] * (job.total - job.done)
+    df_result = df.copy()
+    if email_col:
+        df_result[email_col] = results
+    else:
+        df_result["Found Email"] = results
+    return df_result
+
+def format_eta(seconds):
+    if seconds is None:
+        return "—"
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes}m {secs:02d}s" if minutes else f"{secs}s"
+
+def job_panel(job_id, show_results=None):
+    """Progress for one job: refreshes itself every second while it runs, rendered once when it is not."""
+    job = get_job_registry().get(job_id)
+    if job is None:
+        return
+    if job.running:
+        live_job_panel(job_id, show_results)
+    else:
+        job_panel_body(job, show_results)
+
+@st.fragment(run_every=1.0)
+def live_job_panel(job_id, show_results=None):
+    """Reruns every second without rerunning the page; reruns the page once the job stops."""
+    job = get_job_registry().get(job_id)
+    if job is None or not job.running:
+        st.rerun(scope="app")   # so the finished job leaves the timed fragment
+    job_panel_body(job, show_results)
+
+def job_panel_body(job, show_results=None):
+    st.progress(job.done / job.total if job.total else 1.0,
+                text=f"{job.label} [{job.id}]: {job.done}/{job.total} rows — {job.status}")
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Rows/sec", f"{job.rate():.1f}")
+    c2.metric("ETA", format_eta(job.eta()) if job.running else "—")
+    with c3:
+        if job.cancelling:
+            st.caption("Cancelling after the current batch…")
+        elif job.running:
+            if st.button("Cancel", key=f"cancel_{job.id}"):
+                job.cancel()
+        elif job.status in ("cancelled", "failed"):
+            if st.button("Resume", key=f"resume_{job.id}"):
+                job.resume()
+                st.rerun()   # show it in the live panel
+    if job.meta:
+        st.caption(", ".join(f"{k}={v}" for k, v in job.meta.items()))
+    for msg in job.log[-5:]:
+        st.caption(msg)
+    if show_results is not None:
+        show_results(job)
 
 # ------------------------------------------------------------
 # UI: Tabs
@@ -87,49 +274,40 @@ with tabs[0]:
     your_portfolio = st.text_input("Your portfolio URL", value=getattr(module, "YOUR_PORTFOLIO", "https://yourportfolio.com") if module else "https://yourportfolio.com")
 
     def generate_from_df(df, templates_dict, config):
-        out_rows = []
-        for idx, row in df.iterrows():
-            status = str(row.get("Status", "")).strip().lower()
-            if status in ["sent", "replied"]:
-                continue
-            tag = str(row.get("Tag", "")).strip()
-            if not tag or tag not in templates_dict:
-                out_rows.append({
-                    "Name": row.get("Name", ""),
-                    "Generated PEC": f"❌ Skipped (unknown/empty tag: '{tag}')"
-                })
-                continue
-            data = {
-                "artist_name": row.get("Name", ""),
-                "your_name": config["your_name"],
-                "city": config["city"],
-                "brand": config["brand"],
-                "portfolio": config["portfolio"],
-                "event": row.get("Event", ""),
-                "venue": row.get("Venue", ""),
-                "date": row.get("Date", "")
-            }
-            try:
-                msg = templates_dict[tag].format(**data)
-            except Exception as e:
-                msg = f"❌ Template format error: {e}"
-            out_rows.append({"Name": row.get("Name", ""), "Generated PEC": msg})
-        out_df = pd.DataFrame(out_rows)
+        rendered = pec_render.render_pecs(df, templates_dict, config,
+                                          on_error=lambda tag, e: f"❌ Template format error: {e}")
+        pending = pec_render.pending_mask(df)
+        row_tags = pec_render.tags(df)
+        unknown = pending & ~row_tags.isin(list(templates_dict))
+        skipped = pd.DataFrame({
+            "Name": pec_render.names(df)[unknown],
+            "Generated PEC": "❌ Skipped (unknown/empty tag: '" + row_tags[unknown] + "')",
+        })
+        # back into sheet order: pending rows are exactly the rendered + skipped ones
+        out_df = pd.concat([rendered, skipped]).reindex(df.index[pending]).reset_index(drop=True)
         return out_df
 
+    @st.cache_data(show_spinner=False, max_entries=16)
+    def generate_pecs_cached(source_hash, templates_items, config_items, _df):
+        """generate_from_df memoised on (input content hash, template set, identity settings)."""
+        return generate_from_df(_df, dict(templates_items), dict(config_items))
+
     if mode.startswith("CSV"):
-        uploaded = st.file_uploader("Upload OutreachLeads CSV", type=["csv"], accept_multiple_files=False, key="pec_csv")
+        uploaded = st.file_uploader("Upload OutreachLeads file (CSV, Parquet or Feather)", type=lead_io.UPLOAD_TYPES,
+                                    accept_multiple_files=False, key="pec_csv")
         if uploaded:
-            df = pd.read_csv(uploaded)
+            upload_bytes = uploaded.getvalue()
+            upload_hash = content_hash(upload_bytes)
+            df = parse_lead_upload(upload_hash, uploaded.name, upload_bytes)
             st.write("Preview of uploaded sheet (first 10 rows):")
             st.dataframe(df.head(10))
             templates_dict = getattr(module, "templates", {}) if module else {}
             config = {"your_name": your_name, "city": your_city, "brand": your_brand, "portfolio": your_portfolio}
-            out_df = generate_from_df(df, templates_dict, config)
+            out_df = generate_pecs_cached(upload_hash, tuple(sorted(templates_dict.items())),
+                                          tuple(sorted(config.items())), df)
             st.markdown("### Generated PECs (preview)")
             st.dataframe(out_df.head(50))
-            csv_bytes = out_df.to_csv(index=False).encode("utf-8")
-            st.download_button("Download GeneratedPECs.csv", data=csv_bytes, file_name="GeneratedPECs.csv", mime="text/csv")
+            lead_download("Download GeneratedPECs", out_df, "GeneratedPECs", key="pec_download")
 
     else:
         st.info("Google Sheets mode will connect to the sheet named `OutreachLog`. Upload the service-account JSON and authorize.")
@@ -138,32 +316,35 @@ with tabs[0]:
         leads_ws_name = st.text_input("Leads worksheet name (default: OutreachLeads)", value="OutreachLeads", key="pec_leadsname")
         output_ws_name = st.text_input("Output worksheet name (default: GeneratedPECs)", value="GeneratedPECs", key="pec_outputname")
         operate = st.checkbox("Allow writing to Google Sheets (will update Status + Timestamp and add output sheet)", value=False, key="pec_operate")
-        run_button = st.button("Preview generation from Google Sheet", key="pec_run")
+        batch_size = st.number_input("Sheets write batch size (rows/cells per API call)", min_value=1, value=DEFAULT_BATCH_SIZE, key="pec_batch_size")
+        incremental_output = st.checkbox("Only write new / changed PECs (adds Lead Key and Content Hash columns "
+                                         "to the output sheet)", value=False, key="pec_incremental")
+        if st.button("Preview generation from Google Sheet", key="pec_run"):
+            st.session_state["pec_preview_on"] = True
+        # stays on across reruns, so the confirm button and background jobs below keep rendering
+        run_button = st.session_state.get("pec_preview_on", False)
 
         if run_button:
             if not uploaded_key:
                 st.error("Please upload the service-account JSON file.")
             else:
-                # save key to temp path
-                key_path = os.path.join(".", uploaded_key.name)
-                with open(key_path, "wb") as f:
-                    f.write(uploaded_key.getbuffer())
-                try:
-                    import gspread
-                    from oauth2client.service_account import ServiceAccountCredentials
-                except Exception as e:
-                    st.error("Missing libraries: please `pip install gspread oauth2client`. Error: " + str(e))
+                missing = missing_sheets_libraries()
+                if missing:
+                    st.error("Missing libraries: please `pip install gspread oauth2client`. Not installed: "
+                             + ", ".join(missing))
                     st.stop()
-                scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-                creds = ServiceAccountCredentials.from_json_keyfile_name(key_path, scope)
-                client = gspread.authorize(creds)
+                # client, spreadsheet and worksheet handles are cached resources keyed on the key file's hash
+                key_bytes = uploaded_key.getvalue()
+                key_hash = content_hash(key_bytes)
                 try:
-                    sh = client.open(sheet_name)
-                    leads_ws = sh.worksheet(leads_ws_name)
+                    client = get_gspread_client(key_hash, key_bytes)
+                    sh = open_spreadsheet(key_hash, sheet_name, client)
+                    leads_ws = open_worksheet(key_hash, sheet_name, leads_ws_name, sh)
                 except Exception as e:
                     st.error(f"Failed to open sheet/worksheet: {e}")
                     st.stop()
-                rows = leads_ws.get_all_values()
+                rows = read_worksheet_values(key_hash, sheet_name, leads_ws_name, leads_ws)
+                rows_hash = content_hash(json.dumps(rows).encode("utf-8"))
                 if not rows or len(rows) < 2:
                     st.error("No data (or only header) found in worksheet.")
                 else:
@@ -174,48 +355,61 @@ with tabs[0]:
                     st.dataframe(df.head(10))
                     templates_dict = getattr(module, "templates", {})
                     config = {"your_name": your_name, "city": your_city, "brand": your_brand, "portfolio": your_portfolio}
-                    out_df = generate_from_df(df, templates_dict, config)
+                    out_df = generate_pecs_cached(rows_hash, tuple(sorted(templates_dict.items())),
+                                                  tuple(sorted(config.items())), df)
                     st.markdown("### Generated PECs (preview)")
                     st.dataframe(out_df.head(50))
                     if operate:
                         if st.button("Write GeneratedPECs sheet + update statuses (Confirm)", key="pec_write"):
-                            # create/clear output worksheet then append
+                            # rewrite (or, opted in, upsert) the output worksheet, then update statuses;
+                            # the writes run as background jobs
                             try:
                                 try:
                                     output_ws = sh.worksheet(output_ws_name)
-                                    output_ws.clear()
                                 except Exception:
-                                    output_ws = sh.add_worksheet(title=output_ws_name, rows="100", cols="3")
-                                output_ws.append_row(["Name", "Generated PEC"])
-                                for _, r in out_df.iterrows():
-                                    output_ws.append_row([r["Name"], r["Generated PEC"]])
-                                st.success(f"Output written to worksheet '{output_ws_name}'")
+                                    output_ws = sh.add_worksheet(title=output_ws_name, rows="100", cols="4")
+                                st.session_state["pec_write_jobs"] = []
+                                if not incremental_output:
+                                    output_ws.clear()
+                                    out_rows = [["Name", "Generated PEC"]] + out_df[["Name", "Generated PEC"]].values.tolist()
+                                    job = start_sheets_write_job(f"Write {output_ws_name}", output_ws, out_rows,
+                                                                 batch_size, cells=False)
+                                    st.session_state["pec_write_jobs"].append(job.id)
+                                else:
+                                    rendered = df[pec_render.pending_mask(df)].reset_index(drop=True)
+                                    pec_rows = pec_output.output_rows(out_df, pec_render.lead_keys(rendered),
+                                                                      pec_render.content_hashes(rendered, templates_dict, config))
+                                    appends, changed_cells, upsert = pec_output.prepare_upsert(output_ws, pec_rows)
+                                    st.write(f"{output_ws_name}: {upsert['appended']} new, {upsert['updated']} updated, "
+                                             f"{upsert['unchanged']} unchanged")
+                                    if appends:
+                                        job = start_sheets_write_job(f"Append to {output_ws_name}", output_ws, appends,
+                                                                     batch_size, cells=False)
+                                        st.session_state["pec_write_jobs"].append(job.id)
+                                    if changed_cells:
+                                        job = start_sheets_write_job(f"Update {output_ws_name}", output_ws, changed_cells,
+                                                                     batch_size)
+                                        st.session_state["pec_write_jobs"].append(job.id)
                             except Exception as e:
                                 st.error(f"Failed to write output sheet: {e}")
 
                             # update statuses
                             try:
                                 col_map = {key: headers.index(key) for key in headers}
-                                for idx0, row in df.iterrows():
-                                    status = str(row.get("Status", "")).strip().lower()
-                                    if status in ["sent", "replied"]:
-                                        continue
-                                    tag = str(row.get("Tag", "")).strip()
-                                    if not tag or tag not in templates_dict:
-                                        continue
+                                to_mark = pec_render.pending_mask(df) & pec_render.tags(df).isin(list(templates_dict))
+                                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                cells = []
+                                for idx0 in df.index[to_mark]:
                                     sheet_row = idx0 + 2
-                                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                    leads_ws.update_cell(sheet_row, col_map["Status"] + 1, "Sent")
-                                    leads_ws.update_cell(sheet_row, col_map["Timestamp"] + 1, timestamp)
-                                st.success("Statuses/timestamps attempted to be updated.")
+                                    cells.append((sheet_row, col_map["Status"] + 1, "Sent"))
+                                    cells.append((sheet_row, col_map["Timestamp"] + 1, timestamp))
+                                job = start_sheets_write_job("Update Status/Timestamp", leads_ws, cells, batch_size,
+                                                             on_done=lambda job: read_worksheet_values.clear())
+                                st.session_state.setdefault("pec_write_jobs", []).append(job.id)
                             except Exception as e:
                                 st.error(f"Failed to update status/timestamp: {e}")
-                # cleanup temp key
-                try:
-                    if os.path.exists(key_path):
-                        os.remove(key_path)
-                except Exception:
-                    pass
+                    for job_id in st.session_state.get("pec_write_jobs", []):
+                        job_panel(job_id)
 
 # -------------------------
 # TAB 2: Email Finder
@@ -231,67 +425,51 @@ with tabs[1]:
     )
     email_mode = st.radio("Mode", ["CSV (upload)", "Google Sheets (connect)"], key="email_mode")
 
+    ig_concurrency = st.number_input("Concurrent IG requests", min_value=1, max_value=32,
+                                     value=DEFAULT_IG_CONCURRENCY, step=1, key="ig_concurrency")
     run_ig = st.button("Run IG email scrape (only)", key="run_ig")
     run_fb = st.button("Run FB email scrape (Selenium, local only)", key="run_fb")
 
     if email_mode.startswith("CSV"):
-        uploaded = st.file_uploader("Upload OutreachLeads CSV", type=["csv"], accept_multiple_files=False, key="email_csv")
+        uploaded = st.file_uploader("Upload OutreachLeads file (CSV, Parquet or Feather)", type=lead_io.UPLOAD_TYPES,
+                                    accept_multiple_files=False, key="email_csv")
         if uploaded:
-            df = pd.read_csv(uploaded)
+            upload_bytes = uploaded.getvalue()
+            upload_hash = content_hash(upload_bytes)
+            df = parse_lead_upload(upload_hash, uploaded.name, upload_bytes)
             st.write("Preview (first 10 rows):")
             st.dataframe(df.head(10))
             # ensure columns exist
             if "Name" not in df.columns or ("Email" not in df.columns and "E-mail" not in df.columns and "Email Address" not in df.columns):
                 st.info("Your CSV should ideally contain a column named 'Email' and 'Name'. The app will still attempt to use column index positions.")
             # Normalize: choose email column if present
-            email_col = None
-            for c in ["Email", "E-mail", "email", "Email Address"]:
-                if c in df.columns:
-                    email_col = c
-                    break
-
-            ig_col = None
-            for c in ["IG", "Instagram", "IG Link", "ig_link", "Instagram URL"]:
-                if c in df.columns:
-                    ig_col = c
-                    break
-
-            fb_col = None
-            for c in ["FB", "Facebook", "FB Link", "facebook_link", "FB Link"]:
-                if c in df.columns:
-                    fb_col = c
-                    break
+            email_col, ig_col, fb_col = detect_columns(df)
 
             st.write("Columns detected:", {"email_col": email_col, "ig_col": ig_col, "fb_col": fb_col})
 
-            # Run IG scraping
+            # Run IG scraping (background job; results fill in live and survive reruns)
             if run_ig:
-                st.info("Running IG scraping for rows missing email...")
-                results = []
-                for idx, row in df.iterrows():
-                    cur_email = str(row.get(email_col, "")).strip() if email_col else ""
-                    if cur_email:
-                        results.append(cur_email)
-                        continue
-                    ig_url = row.get(ig_col, "") if ig_col else ""
-                    if not ig_url or pd.isna(ig_url):
-                        results.append("")
-                        continue
-                    try:
-                        found = scrape_instagram_bio(ig_url)
-                        results.append(found[0] if found else "")
-                    except Exception as e:
-                        results.append("")
-                        st.warning(f"Row {idx+1}: IG scrape error: {e}")
-                df_result = df.copy()
-                if email_col:
-                    df_result[email_col] = results
-                else:
-                    df_result["Found Email"] = results
-                st.markdown("### Results (first 50 rows)")
-                st.dataframe(df_result.head(50))
-                csv_bytes = df_result.to_csv(index=False).encode("utf-8")
-                st.download_button("Download CSV with found emails", data=csv_bytes, file_name="Outreach_with_emails.csv", mime="text/csv")
+                start_ig_job(upload_hash, df, email_col, ig_col, ig_concurrency)
+            ig_job = get_job_registry().find(f"ig:{upload_hash}:{email_col}:{ig_col}")
+            if ig_job is not None and ig_job.id in st.session_state.get("job_ids", []):
+                def show_ig_results(job):
+                    df_result = ig_results_frame(job, df, email_col)
+                    st.markdown("### Results (first 50 rows)")
+                    st.dataframe(df_result.head(50))
+                    lead_download("Download leads with found emails", df_result, "Outreach_with_emails",
+                                  key="ig_csv_download")
+                job_panel(ig_job.id, show_ig_results)
+
+            # Hand the file to the long-running scrape worker (warm HTTP pool / FB session, see scrape_worker.py)
+            worker_fb = st.checkbox("Worker: also scrape FB (worker must run with a chromedriver)", key="worker_fb_csv")
+            if st.button("Queue this file on the scrape worker", key="worker_submit_csv"):
+                os.makedirs(scrape_worker.SPOOL_DIR, exist_ok=True)
+                spool_path = os.path.join(scrape_worker.SPOOL_DIR,
+                                          f"upload_{upload_hash[:16]}.{lead_io.EXTENSIONS[lead_io.lead_format(uploaded.name)]}")
+                with open(spool_path, "wb") as f:
+                    f.write(upload_bytes)
+                job_id = get_worker_queue().submit("csv", spool_path, options={"fb": worker_fb})
+                st.success(f"Queued worker job #{job_id}")
 
             # Run FB (Selenium) as subprocess (optional)
             if run_fb:
@@ -332,31 +510,43 @@ with tabs[1]:
         sheet_name = st.text_input("Google Spreadsheet name (default: OutreachLog)", value="OutreachLog", key="email_sheetname")
         leads_ws_name = st.text_input("Leads worksheet name (default: OutreachLeads)", value="OutreachLeads", key="email_leadsname")
         operate = st.checkbox("Allow writing back found emails to Google Sheets (will overwrite Email column)", value=False, key="email_operate")
-        run_button = st.button("Preview emails from Google Sheet", key="email_run")
+        batch_size = st.number_input("Sheets write batch size (cells per API call)", min_value=1, value=DEFAULT_BATCH_SIZE, key="email_batch_size")
+        with st.expander("Queue a sheet range on the scrape worker"):
+            st.caption("The worker opens the sheet itself, so it needs the service-account key file on its machine.")
+            worker_key = st.text_input("Key file path on the worker", value=scrape_worker.DEFAULT_KEY_FILE,
+                                       key="worker_key_path")
+            first_row = st.number_input("First sheet row", min_value=2, value=2, key="worker_first_row")
+            last_row = st.number_input("Last sheet row (0 = to the end)", min_value=0, value=0, key="worker_last_row")
+            worker_fb = st.checkbox("Also scrape FB (worker must run with a chromedriver)", key="worker_fb_sheet")
+            if st.button("Queue sheet range", key="worker_submit_sheet"):
+                source = scrape_worker.sheet_source(sheet_name, leads_ws_name, first_row, last_row or None, worker_key)
+                job_id = get_worker_queue().submit("sheet", source, options={"fb": worker_fb, "write_back": operate})
+                st.success(f"Queued worker job #{job_id}" + (" (found emails will be written back)" if operate else ""))
+        if st.button("Preview emails from Google Sheet", key="email_run"):
+            st.session_state["email_preview_on"] = True
+        run_button = st.session_state.get("email_preview_on", False)
 
         if run_button:
             if not uploaded_key:
                 st.error("Please upload the service-account JSON file.")
             else:
-                key_path = os.path.join(".", uploaded_key.name)
-                with open(key_path, "wb") as f:
-                    f.write(uploaded_key.getbuffer())
-                try:
-                    import gspread
-                    from oauth2client.service_account import ServiceAccountCredentials
-                except Exception as e:
-                    st.error("Missing libraries: please `pip install gspread oauth2client`. Error: " + str(e))
+                missing = missing_sheets_libraries()
+                if missing:
+                    st.error("Missing libraries: please `pip install gspread oauth2client`. Not installed: "
+                             + ", ".join(missing))
                     st.stop()
-                scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-                creds = ServiceAccountCredentials.from_json_keyfile_name(key_path, scope)
-                client = gspread.authorize(creds)
+                # client, spreadsheet and worksheet handles are cached resources keyed on the key file's hash
+                key_bytes = uploaded_key.getvalue()
+                key_hash = content_hash(key_bytes)
                 try:
-                    sh = client.open(sheet_name)
-                    leads_ws = sh.worksheet(leads_ws_name)
+                    client = get_gspread_client(key_hash, key_bytes)
+                    sh = open_spreadsheet(key_hash, sheet_name, client)
+                    leads_ws = open_worksheet(key_hash, sheet_name, leads_ws_name, sh)
                 except Exception as e:
                     st.error(f"Failed to open sheet/worksheet: {e}")
                     st.stop()
-                rows = leads_ws.get_all_values()
+                rows = read_worksheet_values(key_hash, sheet_name, leads_ws_name, leads_ws)
+                rows_hash = content_hash(json.dumps(rows).encode("utf-8"))
                 if not rows or len(rows) < 2:
                     st.error("No data (or only header) found in worksheet.")
                 else:
@@ -367,72 +557,52 @@ with tabs[1]:
                     st.dataframe(df.head(10))
 
                     # detect IG / email columns
-                    email_col = None
-                    for c in ["Email", "E-mail", "email", "Email Address"]:
-                        if c in df.columns:
-                            email_col = c
-                            break
-                    ig_col = None
-                    for c in ["IG", "Instagram", "IG Link", "ig_link", "Instagram URL"]:
-                        if c in df.columns:
-                            ig_col = c
-                            break
+                    email_col, ig_col, _ = detect_columns(df)
                     st.write("Detected columns:", {"email_col": email_col, "ig_col": ig_col})
 
-                    # Run IG scraping
+                    # Run IG scraping (background job)
                     if run_ig:
-                        st.info("Running IG scraping for rows missing email...")
-                        results = []
-                        for idx, row in df.iterrows():
-                            cur_email = str(row.get(email_col, "")).strip() if email_col else ""
-                            if cur_email:
-                                results.append(cur_email)
-                                continue
-                            ig_url = row.get(ig_col, "") if ig_col else ""
-                            if not ig_url or pd.isna(ig_url):
-                                results.append("")
-                                continue
-                            try:
-                                found = scrape_instagram_bio(ig_url)
-                                results.append(found[0] if found else "")
-                            except Exception as e:
-                                results.append("")
-                                st.warning(f"Row {idx+2}: IG scrape error: {e}")  # +2 to reflect sheet row
-                        df_result = df.copy()
-                        if email_col:
-                            df_result[email_col] = results
-                        else:
-                            df_result["Found Email"] = results
-                        st.markdown("### Results (first 50 rows)")
-                        st.dataframe(df_result.head(50))
-                        csv_bytes = df_result.to_csv(index=False).encode("utf-8")
-                        st.download_button("Download CSV with found emails", data=csv_bytes, file_name="Outreach_with_emails.csv", mime="text/csv")
-
-                        # optionally write back
-                        if operate:
+                        start_ig_job(rows_hash, df, email_col, ig_col, ig_concurrency)
+                    ig_job = get_job_registry().find(f"ig:{rows_hash}:{email_col}:{ig_col}")
+                    if ig_job is not None and ig_job.id in st.session_state.get("job_ids", []):
+                        def show_ig_results(job):
+                            df_result = ig_results_frame(job, df, email_col)
+                            st.markdown("### Results (first 50 rows)")
+                            st.dataframe(df_result.head(50))
+                            lead_download("Download leads with found emails", df_result, "Outreach_with_emails",
+                                          key="ig_sheet_download")
+                        job_panel(ig_job.id, show_ig_results)
+
+                        # optionally write back once the scrape has finished
+                        if operate and ig_job.status == "done":
                             if st.button("Write found emails back to Google Sheet (Confirm)", key="email_write"):
-                                try:
+                                if not email_col:
+                                    # if email col missing, warn and skip write
+                                    st.warning("No email column found; cannot write back without a column named 'Email'.")
+                                else:
                                     col_map = {key: headers.index(key) for key in headers}
-                                    for idx0, val in enumerate(results):
-                                        if not val:
-                                            continue
-                                        sheet_row = idx0 + 2
-                                        if email_col:
-                                            leads_ws.update_cell(sheet_row, col_map[email_col] + 1, val)
-                                        else:
-                                            # if email col missing, warn and skip write
-                                            st.warning("No email column found; cannot write back without a column named 'Email'.")
-                                            break
-                                    st.success("Attempted to write found emails back to sheet.")
-                                except Exception as e:
-                                    st.error(f"Failed to write back found emails: {e}")
-
-                # cleanup
-                try:
-                    if os.path.exists(key_path):
-                        os.remove(key_path)
-                except Exception:
-                    pass
+                                    cells = [(idx0 + 2, col_map[email_col] + 1, val)
+                                             for idx0, val in enumerate(ig_job.results) if val]
+                                    job = start_sheets_write_job("Write found emails", leads_ws, cells, batch_size,
+                                                                 on_done=lambda job: read_worksheet_values.clear())
+                                    st.session_state["email_write_job"] = job.id
+                        if st.session_state.get("email_write_job"):
+                            job_panel(st.session_state["email_write_job"])
+
+    with st.expander("Scrape worker queue"):
+        worker_jobs = get_worker_queue().list(20)
+        if not worker_jobs:
+            st.caption("No jobs yet. Start the worker with `python scrape_worker.py serve`.")
+        else:
+            st.dataframe(pd.DataFrame([{
+                "id": j["id"], "status": j["status"], "kind": j["kind"],
+                "rows": f"{j['rows_done']}/{j['rows_total'] if j['rows_total'] is not None else '?'}",
+                "found_ig": (j["stats"] or {}).get("found_ig"), "found_fb": (j["stats"] or {}).get("found_fb"),
+                "output": (j["stats"] or {}).get("output") or j["output"], "error": j["error"],
+            } for j in worker_jobs]))
+            cancel_id = st.number_input("Job id", min_value=1, value=worker_jobs[0]["id"], key="worker_cancel_id")
+            if st.button("Cancel job", key="worker_cancel"):
+                st.write(f"Job #{cancel_id}: {get_worker_queue().cancel(int(cancel_id))}")
 
     st.markdown("---")
     st.caption("If you plan to run FB scraping, it's safer to run your Selenium script locally in a terminal window (the script you pasted earlier). The 'run FB' subprocess trigger in CSV mode is a convenience but may not work in all environments; run locally for best results.")
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+
+Usage:
+    python benchmark.py > bench.json                        # 1k/10k/100k rows, scraper + PEC generator
+    python benchmark.py --rows 1000 --suites scrape         # quick scraper-only run
+    python benchmark.py --suites extract                    # email extraction on 512 KB / 2 MB pages
+    python benchmark.py --latency-ms 80 --error-rate 0.05 --page-kb 300 --concurrency 32
+    python benchmark.py --suites scrape --rate-limit 50     # hosts that 429 (Retry-After handling)
+
+Offline throughput benchmark. Starts one local HTTP server that stands in for
+Instagram profile pages (/ig/...), Facebook About pages (/fb/...) and the Google
+Sheets + Drive APIs (/v4/spreadsheets/..., /drive/v3/files), with configurable
+latency, error rate and page size. Synthetic lead files are generated, then each
+(suite, rows) case runs in a fresh child process so peak RSS is per case:
+
+ - scrape: email_scraper_v2.run_on_dataframe, IG plus FB over HTTP (--fb-http path;
+   pages that would need a browser are only counted, no Chrome is started)
+ - pec:    bulk_pec_generator.generate_bulk_messages against the fake Sheets API
+ - extract: email extraction over large FB-like page_source (mostly <script> JSON with
+   long tokens), the old EMAIL_RE.findall against email_extract.extract_emails
+
+Progress goes to stderr; the JSON report (rows/sec, p50/p99 latency, peak RSS,
+API calls per endpoint) goes to stdout and to --out if given.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_ROWS = [1000, 10000, 100000]
+DEFAULT_EXTRACT_PAGE_KB = [512, 2048]
+SUITES = ["scrape", "pec", "extract"]
+ROW_SUITES = ["scrape", "pec"]
+SPREADSHEET_ID = "bench"
+SPREADSHEET_TITLE = "OutreachLog"
+LEADS_SHEET = "OutreachLeads"
+LEAD_HEADERS = ["Name", "IG", "FB", "Email", "Tag", "Status", "Event", "Venue", "Date", "Timestamp"]
+TAGS = ["artist_bad", "artist_good", "venue_bad", "venue_good", "curator_bad", "curator_good"]
+
+
+# ==== FAKE SERVICES ====
+
+def filler(size, unit="<div class=\"post\"><p>Live tonight at the club, doors at 9.</p></div>\n"):
+    """About size characters of page-like markup."""
+    return unit * (size // len(unit) + 1)
+
+
+class FakeServices:
+    """
+    In-memory IG / FB / Sheets stand-ins behind one ThreadingHTTPServer.
+
+    IG and FB paths encode the outcome: /ig/e_<n> has an email in og:description,
+    /ig/n_<n> has a bio without one, /ig/x_<n> is a 404; /fb/e_<n>/about and
+    /fb/n_<n>/about likewise. Every request waits latency seconds and fails with
+    probability error_rate (503 for IG/FB, 429 for Sheets, like the real quotas).
+    With rate_limit, IG / FB answer 429 with Retry-After: 1 to requests past
+    rate_limit per second per source.
+    """
+    def __init__(self, latency=0.02, error_rate=0.0, page_size=100 * 1024, seed=0, rate_limit=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._windows = {}
+        self.page_size = page_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {}
+        self.sheets = {}
+        self.server = None
+
+    def start(self):
+        services = self
+
+        class Handler(_Handler):
+            pass
+        Handler.services = services
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 256
+        threading.Thread(target=self.server.serve_forever, name="bench-server", daemon=True).start()
+        return self
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def reset(self, leads=None):
+        """Zero the call counters and reload the leads worksheet (list of rows, header first)."""
+        with self._lock:
+            self.calls = {}
+            self.sheets = {LEADS_SHEET: [list(r) for r in leads]} if leads is not None else {}
+
+    def count(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def fail(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def throttled(self, source):
+        """True when source is past rate_limit requests in the current one-second window."""
+        if not self.rate_limit:
+            return False
+        now = int(time.monotonic())
+        with self._lock:
+            window, count = self._windows.get(source, (now, 0))
+            if window != now:
+                window, count = now, 0
+            self._windows[source] = (window, count + 1)
+            if count + 1 > self.rate_limit:
+                self.calls[f"{source}_429"] = self.calls.get(f"{source}_429", 0) + 1
+                return True
+            return False
+
+    # -- pages --
+
+    def ig_page(self, handle):
+        kind, _, n = handle.partition("_")
+        if kind == "x":
+            return None
+        bio = f"Live sets every weekend. Bookings: {handle}@bench.test" if kind == "e" else "Live sets every weekend."
+        head = (f'<html><head><title>{handle}</title><script>{filler(self.page_size // 4, "var x = 1;")}</script>'
+                f'<meta property="og:description" content="{bio}"></head><body>')
+        return head + filler(max(0, self.page_size - len(head))) + "</body></html>"
+
+    def fb_page(self, handle):
+        kind, _, n = handle.partition("_")
+        contact = f"<span>{handle}@bench.test</span>" if kind == "e" else "<span>No contact info</span>"
+        pad = filler(max(2000, self.page_size // 2))
+        return f"<html><head><title>{handle}</title></head><body>{pad}<div id='contact'>{contact}</div></body></html>"
+
+    # -- sheets --
+
+    def sheet_metadata(self):
+        sheets = []
+        for i, (title, rows) in enumerate(self.sheets.items()):
+            sheets.append({"properties": {
+                "sheetId": i, "title": title, "index": i, "sheetType": "GRID",
+                "gridProperties": {"rowCount": max(1000, len(rows)), "columnCount": 26},
+            }})
+        return {"spreadsheetId": SPREADSHEET_ID, "properties": {"title": SPREADSHEET_TITLE, "locale": "en_US",
+                                                                 "timeZone": "Etc/GMT"}, "sheets": sheets}
+
+    def add_sheet(self, title):
+        with self._lock:
+            self.sheets[title] = []
+            index = list(self.sheets).index(title)
+        return {"sheetId": index, "title": title, "index": index, "sheetType": "GRID",
+                "gridProperties": {"rowCount": 1000, "columnCount": 26}}
+
+    def sheet_rows(self, a1_range):
+        """Rows of the worksheet an A1 range ("'Title'!B2" or "'Title'") points at."""
+        title = a1_range.split("!", 1)[0]
+        if title.startswith("'") and title.endswith("'"):
+            title = title[1:-1].replace("''", "'")
+        return self.sheets[title]
+
+    def range_values(self, a1_range, columns=False):
+        """Values an A1 range covers ("'T'!A1:1", "'T'!B2:B", "'T'!A5:J9" or a bare title), trimmed like the API."""
+        rows = self.sheet_rows(a1_range)
+        cells = a1_range.split("!", 1)[1] if "!" in a1_range else ""
+        m = re.match(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$", cells)
+        c1, r1, c2, r2 = m.groups() if m else ("", "", "", "")
+
+        def col(letters, default):
+            n = 0
+            for letter in letters or "":
+                n = n * 26 + ord(letter) - 64
+            return n or default
+
+        top, bottom = int(r1 or 1), int(r2 or (r1 if r1 and c2 is None else 0) or len(rows))
+        left, right = col(c1, 1), col(c2 if c2 is not None else c1, 0) or 10 ** 6
+        with self._lock:
+            block = [list(r[left - 1:right]) for r in rows[top - 1:bottom]]
+        if columns:
+            width = max((len(r) for r in block), default=0)
+            block = [[r[i] if i < len(r) else "" for r in block] for i in range(width)]
+        for line in block:
+            while line and line[-1] == "":
+                line.pop()
+        while block and not block[-1]:
+            block.pop()
+        return block
+
+    def set_cell(self, a1_range, value):
+        m = re.search(r"!([A-Z]+)(\d+)$", a1_range)
+        col = 0
+        for letter in m.group(1):
+            col = col * 26 + ord(letter) - 64
+        row = int(m.group(2))
+        with self._lock:
+            rows = self.sheet_rows(a1_range)
+            while len(rows) < row:
+                rows.append([])
+            cells = rows[row - 1]
+            while len(cells) < col:
+                cells.append("")
+            cells[col - 1] = value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, so the pooled client reuses connections
+    services = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+        try:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # the IG client stops reading once it has the <head>
+
+    def _json(self, status, payload):
+        self._send(status, json.dumps(payload), "application/json")
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def _route(self, method):
+        services = self.services
+        path = unquote(urlsplit(self.path).path)
+        body = self._body() if method == "POST" else None
+        time.sleep(services.latency)
+
+        if path.startswith("/ig/") or path.startswith("/fb/"):
+            source = path[1:3]
+            services.count(source)
+            if services.throttled(source):
+                return self._send(429, "slow down", headers={"Retry-After": "1"})
+            if services.fail():
+                return self._send(503, "busy")
+            handle = path.split("/")[2]
+            page = services.ig_page(handle) if source == "ig" else services.fb_page(handle)
+            if page is None:
+                return self._send(404, "not found")
+            return self._send(200, page)
+
+        if path.startswith("/drive/v3/files"):
+            services.count("drive.files.list")
+            return self._json(200, {"files": [{"id": SPREADSHEET_ID, "name": SPREADSHEET_TITLE}]})
+
+        m = re.match(r"^/v4/spreadsheets/([^/:]+)(.*)$", path)
+        if not m:
+            return self._send(404, "unknown endpoint")
+        rest = m.group(2)
+        if rest == "":
+            op = "spreadsheets.get"
+        elif rest == ":batchUpdate":
+            op = "spreadsheets.batchUpdate"
+        elif rest == "/values:batchUpdate":
+            op = "values.batchUpdate"
+        elif rest.endswith(":append"):
+            op = "values.append"
+        elif rest.endswith(":clear"):
+            op = "values.clear"
+        elif rest == "/values:batchGet":
+            op = "values.batchGet"
+        else:
+            op = "values.get"
+        services.count(op)
+        if services.fail():
+            return self._json(429, {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}})
+
+        a1_range = rest[len("/values/"):].rsplit(":", 1)[0] if op in ("values.append", "values.clear") \
+            else rest[len("/values/"):]
+        try:
+            if op == "spreadsheets.get":
+                return self._json(200, services.sheet_metadata())
+            if op == "spreadsheets.batchUpdate":
+                replies = [{"addSheet": {"properties": services.add_sheet(r["addSheet"]["properties"]["title"])}}
+                           for r in body.get("requests", []) if "addSheet" in r]
+                return self._json(200, {"spreadsheetId": SPREADSHEET_ID, "replies": replies})
+            query = parse_qs(urlsplit(self.path).query)
+            dimension = query.get("majorDimension", ["ROWS"])[0]
+            if op == "values.get":
+                return self._json(200, {"range": a1_range, "majorDimension": dimension,
+                                        "values": services.range_values(a1_range, dimension == "COLUMNS")})
+            if op == "values.batchGet":
+                return self._json(200, {"spreadsheetId": SPREADSHEET_ID, "valueRanges": [
+                    {"range": r, "majorDimension": dimension, "values": services.range_values(r, dimension == "COLUMNS")}
+                    for r in query.get("ranges", [])]})
+            if op == "values.clear":
+                services.sheet_rows(a1_range).clear()
+                return self._json(200, {"spreadsheetId": SPREADSHEET_ID, "clearedRange": a1_range})
+            if op == "values.append":
+                services.sheet_rows(a1_range).extend(body.get("values", []))
+                return self._json(200, {"spreadsheetId": SPREADSHEET_ID,
+                                        "updates": {"updatedRows": len(body.get("values", []))}})
+            for item in body.get("data", []):
+                services.set_cell(item["range"], item["values"][0][0])
+            return self._json(200, {"spreadsheetId": SPREADSHEET_ID, "totalUpdatedCells": len(body.get("data", []))})
+        except KeyError as e:
+            return self._json(400, {"error": {"code": 400, "message": f"Unable to parse range: {e}"}})
+
+
+# ==== SYNTHETIC LEADS ====
+
+def write_leads(path, rows, base_url, seed=0):
+    """
+    Lead file with the mix the scraper sees in practice: ~10% already have an email,
+    ~80% have an IG link (70% of bios carry an email, 5% of profiles are gone),
+    every row has an FB link (half of the About pages list an email).
+    """
+    rnd = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LEAD_HEADERS)
+        for i in range(rows):
+            email = f"known{i}@bench.test" if rnd.random() < 0.1 else ""
+            ig = ""
+            if rnd.random() < 0.8:
+                r = rnd.random()
+                kind = "x" if r < 0.05 else "e" if r < 0.75 else "n"
+                ig = f"{base_url}/ig/{kind}_{i}"
+            fb = f"{base_url}/fb/{'e' if rnd.random() < 0.5 else 'n'}_{i}"
+            tag = rnd.choice(TAGS) if rnd.random() < 0.98 else "unknown_tag"
+            status = "sent" if rnd.random() < 0.1 else ""
+            writer.writerow([f"Lead {i}", ig, fb, email, tag, status, f"Event {i % 50}",
+                             f"Venue {i % 20}", f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", ""])
+    return path
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+# ==== EMAIL EXTRACTION ====
+
+def large_page(size, seed=0):
+    """About size characters shaped like an FB page_source: script JSON with long tokens, styles, a little DOM."""
+    rnd = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+    parts = []
+    length = 0
+    i = 0
+    while length < size:
+        token = "".join(rnd.choice(alphabet) for _ in range(256))
+        part = (f'<script type="application/json">{{"id":"{rnd.getrandbits(64)}","token":"{token}",'
+                f'"icon":"static/logo@2x.png","contact":"page{i}\\u0040json.example"}}</script>'
+                f'<style>.c{i}{{color:#{rnd.getrandbits(24):06x}}}</style>'
+                f'<div class="c{i}"><span>Bookings: page{i}@dom.example</span> or page{i} [at] alt [dot] example</div>')
+        parts.append(part)
+        length += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def run_extract_case(page_kb):
+    from email_extract import EMAIL_RE, extract_emails
+
+    page = large_page(page_kb * 1024)
+    mb = len(page) / (1024 * 1024)
+    variants = [
+        ("legacy_findall", lambda: list(dict.fromkeys(EMAIL_RE.findall(page)))),
+        ("engine", lambda: extract_emails(page, budget=None)),
+        ("engine_strip_scripts", lambda: extract_emails(page, strip_scripts=True, budget=None)),
+    ]
+    result = {"suite": "extract", "page_kb": page_kb}
+    for name, fn in variants:
+        start = time.perf_counter()
+        emails = fn()
+        elapsed = time.perf_counter() - start
+        result[name] = {"seconds": round(elapsed, 4), "mb_per_sec": round(mb / elapsed, 2) if elapsed else None,
+                        "emails": len(emails)}
+    legacy = result["legacy_findall"]["seconds"]
+    for name in ("engine", "engine_strip_scripts"):
+        result[name]["speedup"] = round(legacy / result[name]["seconds"], 1) if result[name]["seconds"] else None
+    return result
+
+
+# ==== CASES (run in a child process) ====
+
+def percentiles(samples):
+    """p50 / p99 in milliseconds (nearest rank)."""
+    if not samples:
+        return {"n": 0, "p50_ms": None, "p99_ms": None}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered) + 0.5)) - 1))]
+    return {"n": len(ordered), "p50_ms": round(rank(0.50) * 1000, 2), "p99_ms": round(rank(0.99) * 1000, 2)}
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:   # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(fn, samples):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+
+class HttpFbPool:
+    """Stand-in for FbDriverPool on the --fb-http path: never starts Chrome, browser fallbacks are only counted."""
+    def __init__(self, size, samples):
+        import email_scraper_v2 as es
+        self._scrape_http = es.scrape_facebook_about_http
+        self.size = size
+        self.browser_fallbacks = 0
+        self.samples = samples
+
+    def scrape(self, url, wait_seconds=5, cache=None):
+        return []
+
+    def scrape_http_first(self, url, wait_seconds=5, cache=None):
+        start = time.perf_counter()
+        emails = self._scrape_http(url, {}, cache=cache)
+        self.samples.append(time.perf_counter() - start)
+        if emails is None:
+            self.browser_fallbacks += 1
+            return []
+        return emails
+
+    def close(self):
+        pass
+
+
+def run_scrape_case(args):
+    import pandas as pd
+    import email_scraper_v2 as es
+    import http_client
+    import scrape_core
+
+    http_client.configure(pool_size=max(args.concurrency, 10), max_retries=args.retries)
+    df = pd.read_csv(args.leads, dtype=str, keep_default_na=False)
+    ig_samples, fb_samples = [], []
+    scrape_core.scrape_instagram_bio = timed(scrape_core.scrape_instagram_bio, ig_samples)
+    pool = HttpFbPool(args.concurrency, fb_samples)
+    start = time.perf_counter()
+    out, stats = es.run_on_dataframe(df, do_fb=True, fb_pool=pool, fb_http=True, concurrency=args.concurrency,
+                                     verbose=False)
+    elapsed = time.perf_counter() - start
+    out.to_csv(os.path.join(os.path.dirname(args.leads), "scrape_output.csv"), index=False)
+    return elapsed, {"ig": percentiles(ig_samples), "fb": percentiles(fb_samples)}, stats
+
+
+class LocalSheetsSession:
+    """requests.Session replacement for gspread that sends Google API calls to the fake server."""
+    def __init__(self, base_url, samples):
+        import requests
+        self._session = requests.Session()
+        self.base_url = base_url
+        self.samples = samples
+
+    def request(self, method, url, **kwargs):
+        for origin in ("https://sheets.googleapis.com", "https://www.googleapis.com"):
+            if url.startswith(origin):
+                url = self.base_url + url[len(origin):]
+        start = time.perf_counter()
+        try:
+            return self._session.request(method, url, **kwargs)
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+    def close(self):
+        self._session.close()
+
+
+def run_pec_case(args):
+    import gspread
+    import bulk_pec_generator
+
+    samples = []
+    client = gspread.Client(None, session=LocalSheetsSession(args.base_url, samples))
+    start = time.perf_counter()
+    bulk_pec_generator.generate_bulk_messages(batch_size=args.batch_size, client=client)
+    elapsed = time.perf_counter() - start
+    return elapsed, {"sheets": percentiles(samples)}, {"rows": args.rows}
+
+
+def run_case(args):
+    """Child-process entry point: run one case and write its result JSON to args.result."""
+    import telemetry
+    runner = run_scrape_case if args.case == "scrape" else run_pec_case
+    elapsed, latency, stats = runner(args)
+    result = {
+        "suite": args.case,
+        "rows": args.rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(args.rows / elapsed, 1) if elapsed > 0 else None,
+        "latency": latency,
+        "peak_rss_mb": peak_rss_mb(),
+        "stats": stats,
+        "telemetry": telemetry.get().snapshot(),
+    }
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# ==== DRIVER ====
+
+def spawn_case(suite, rows, leads, services, opts, workdir):
+    result_path = os.path.join(workdir, f"result_{suite}_{rows}.json")
+    cmd = [sys.executable, os.path.abspath(__file__), "--case", suite, "--leads", leads, "--result", result_path,
+           "--base-url", services.base_url, "--rows", str(rows), "--concurrency", str(opts.concurrency),
+           "--retries", str(opts.retries), "--batch-size", str(opts.batch_size)]
+    output = None if opts.verbose else subprocess.DEVNULL
+    proc = subprocess.run(cmd, stdout=output, stderr=output, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        return {"suite": suite, "rows": rows, "error": f"case exited with status {proc.returncode}"}
+    with open(result_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the scraper and PEC generator.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="Lead file sizes to run.")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES, help="What to benchmark.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake server latency per request.")
+    parser.add_argument("--error-rate", type=float, default=0.01,
+                        help="Fraction of requests answered with 503 (IG/FB) or 429 (Sheets).")
+    parser.add_argument("--page-kb", type=int, default=100, help="Size of the fake IG/FB pages.")
+    parser.add_argument("--extract-page-kb", type=int, nargs="+", default=DEFAULT_EXTRACT_PAGE_KB,
+                        help="Page sizes for the extract suite.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Scraper --concurrency.")
+    parser.add_argument("--retries", type=int, default=3, help="Scraper --retries.")
+    parser.add_argument("--rate-limit", type=int, default=None,
+                        help="Fake IG / FB answer 429 past this many requests per second each.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Sheets write batch size for the PEC run.")
+    parser.add_argument("--workdir", default=None, help="Where lead files and outputs go (default: a temp dir).")
+    parser.add_argument("--out", default=None, help="Also write the JSON report to this file.")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper/generator output of each case.")
+    # internal: run one case in this process (used by the driver for per-case peak RSS)
+    parser.add_argument("--case", choices=ROW_SUITES, help=argparse.SUPPRESS)
+    parser.add_argument("--leads", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        args.rows = args.rows[0]
+        run_case(args)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pec_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    services = FakeServices(latency=args.latency_ms / 1000.0, error_rate=args.error_rate,
+                            page_size=args.page_kb * 1024, rate_limit=args.rate_limit).start()
+    results = []
+    if "extract" in args.suites:
+        for page_kb in args.extract_page_kb:
+            print(f"[BENCH] extract x {page_kb} KB page ...", file=sys.stderr)
+            result = run_extract_case(page_kb)
+            results.append(result)
+            print(f"[BENCH] extract x {page_kb} KB: findall {result['legacy_findall']['mb_per_sec']} MB/s, "
+                  f"engine {result['engine']['mb_per_sec']} MB/s, "
+                  f"with script stripping {result['engine_strip_scripts']['mb_per_sec']} MB/s", file=sys.stderr)
+    try:
+        for rows in args.rows:
+            row_suites = [suite for suite in args.suites if suite in ROW_SUITES]
+            if not row_suites:
+                break
+            leads = write_leads(os.path.join(workdir, f"leads_{rows}.csv"), rows, services.base_url)
+            for suite in row_suites:
+                services.reset(read_rows(leads) if suite == "pec" else None)
+                print(f"[BENCH] {suite} x {rows} rows ...", file=sys.stderr)
+                result = spawn_case(suite, rows, leads, services, args, workdir)
+                result["api_calls"] = dict(services.calls)
+                results.append(result)
+                if "error" in result:
+                    print(f"[BENCH] {suite} x {rows}: {result['error']}", file=sys.stderr)
+                else:
+                    counters = result["telemetry"].get("counters", {})
+                    body = ""
+                    if "body_bytes_read" in counters:
+                        body = (f", IG bodies {counters['body_bytes_read'] // 1024} KB read / "
+                                f"{counters.get('body_bytes_skipped', 0) // 1024} KB skipped")
+                    print(f"[BENCH] {suite} x {rows}: {result['rows_per_sec']} rows/s, "
+                          f"peak RSS {result['peak_rss_mb']} MB, {sum(result['api_calls'].values())} API calls"
+                          f"{body}", file=sys.stderr)
+    finally:
+        services.stop()
+
+    report = {
+        "config": {"latency_ms": args.latency_ms, "error_rate": args.error_rate, "page_kb": args.page_kb,
+                   "rate_limit": args.rate_limit, "concurrency": args.concurrency, "retries": args.retries, "batch_size": args.batch_size,
+                   "python": sys.version.split()[0]},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
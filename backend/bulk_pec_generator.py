@@ -1,8 +1,14 @@
 # bulk_pec_generator.py
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
+import pandas as pd
+
+import pec_output
+import pec_render
+import telemetry
+
+from sheets_batch import SheetsBatchWriter, DEFAULT_BATCH_SIZE
+from sheet_mirror import SheetMirror, sheet_key, DEFAULT_MIRROR_PATH
 
 # ==== TEMPLATES ====
 
@@ -105,13 +111,28 @@ YOUR_PORTFOLIO = "https://yourportfolio.com"
 
 # ==== BULK GENERATOR ====
 
-def generate_bulk_messages():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name("ai-outreach-automation-466008-f443c0dcd46c.json", scope)
-    client = gspread.authorize(creds)
+def generate_bulk_messages(batch_size=DEFAULT_BATCH_SIZE, client=None, mirror=None, output_mode="rewrite"):
+    # client: an authorized gspread client; built from the service-account key file when not given
+    # (benchmark.py passes one that talks to a local fake Sheets API)
+    # mirror: a SheetMirror; leads are then read from the local copy after syncing only changed rows
+    # (a sheet without a modified-time column is read whole, see sheet_mirror)
+    # output_mode: "rewrite" clears and rewrites the whole sheet; "incremental" upserts GeneratedPECs
+    # by lead key + content hash (pec_output), adding those two columns to the sheet
+    if client is None:
+        # Sheets libraries are only needed here; importing this module for `templates` stays light
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+
+        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+        creds = ServiceAccountCredentials.from_json_keyfile_name("ai-outreach-automation-466008-f443c0dcd46c.json", scope)
+        client = gspread.authorize(creds)
 
     sheet = client.open("OutreachLog").worksheet("OutreachLeads")
-    rows = sheet.get_all_values()
+    if mirror is not None:
+        rows, _ = mirror.read(sheet)
+    else:
+        with telemetry.timer("sheets_read"):
+            rows = sheet.get_all_values()
     headers = rows[0]
     data_rows = rows[1:]
 
@@ -122,48 +143,80 @@ def generate_bulk_messages():
     try:
         output = client.open("OutreachLog").worksheet("GeneratedPECs")
     except:
-        output = client.open("OutreachLog").add_worksheet(title="GeneratedPECs", rows="100", cols="2")
-
-    output.clear()
-    output.append_row(["Name", "Generated PEC"])
-
-    for idx, row in enumerate(data_rows, start=2):  # Start at row 2
-        status = row[col_map["Status"]].strip().lower()
-        if status in ["sent", "replied"]:
-            continue
-
-        name = row[col_map["Name"]]
-        event = row[col_map["Event"]]
-        venue = row[col_map["Venue"]]
-        date = row[col_map["Date"]]
-        tag = row[col_map["Tag"]].strip()
-
-        if tag not in templates:
-            print(f"❌ Skipped row {idx}: Unknown tag '{tag}'")
-            continue
-
-        data = {
-            "artist_name": name,
-            "your_name": YOUR_NAME,
-            "city": YOUR_CITY,
-            "brand": YOUR_BRAND,
-            "portfolio": YOUR_PORTFOLIO,
-            "event": event,
-            "venue": venue,
-            "date": date
-        }
-
-        message = templates[tag].format(**data)
-        output.append_row([name, message])
-
-        # Update status and timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sheet.update_cell(idx, col_map["Status"] + 1, "Sent")
-        sheet.update_cell(idx, col_map["Timestamp"] + 1, timestamp)
-
-    print("✅ PECs generated and logged!")
+        output = client.open("OutreachLog").add_worksheet(title="GeneratedPECs", rows="100", cols="4")
+
+    # queue all output rows and Status/Timestamp cells; sent in a few append_rows/batch_update calls
+    writer = SheetsBatchWriter(batch_size=batch_size)
+    if output_mode == "rewrite":
+        output.clear()
+        writer.append_row(output, ["Name", "Generated PEC"])
+
+    df = pd.DataFrame(data_rows, columns=headers)
+    config = {"your_name": YOUR_NAME, "city": YOUR_CITY, "brand": YOUR_BRAND, "portfolio": YOUR_PORTFOLIO}
+
+    # Status/Tag filtering and rendering are whole-column operations (see pec_render)
+    row_tags = pec_render.tags(df)
+    unknown = pec_render.pending_mask(df) & ~row_tags.isin(list(templates))
+    for idx0, tag in row_tags[unknown].items():
+        telemetry.event("skipped_row", row=idx0 + 2, reason="unknown_tag", tag=tag)
+    if unknown.any():
+        print(f"❌ Skipped {int(unknown.sum())} rows with unknown tags")
+    telemetry.incr("pec_skipped_unknown_tag", int(unknown.sum()))
+
+    with telemetry.timer("pec_render"):
+        out = pec_render.render_pecs(df, templates, config)
+    telemetry.incr("pec_generated", len(out))
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        if output_mode == "rewrite":
+            for name, message in zip(out["Name"], out["Generated PEC"]):
+                writer.append_row(output, [name, message])
+        else:
+            rendered = df.loc[out.index]
+            pec_rows = pec_output.output_rows(out, pec_render.lead_keys(rendered),
+                                              pec_render.content_hashes(rendered, templates, config))
+            upsert = pec_output.upsert_pecs(output, pec_rows, writer)
+            for k, v in upsert.items():
+                telemetry.incr(f"pec_output_{k}", v)
+            print(f"📝 GeneratedPECs: {upsert['appended']} new, {upsert['updated']} updated, "
+                  f"{upsert['unchanged']} unchanged")
+
+        for idx0 in out.index:
+            # Update status and timestamp (sheet rows start at 2)
+            writer.update_cell(sheet, idx0 + 2, col_map["Status"] + 1, "Sent")
+            writer.update_cell(sheet, idx0 + 2, col_map["Timestamp"] + 1, timestamp)
+
+        writer.flush()
+    except Exception:
+        if mirror is not None:
+            mirror.invalidate(sheet_key(sheet))   # some cells may have been written; reread everything next run
+        raise
+    if mirror is not None:
+        # our own writes do not change the modified-time column, so apply them to the local copy
+        mirror.set_cells(sheet_key(sheet), [(idx0 + 2, col_map[col] + 1, value) for idx0 in out.index
+                                            for col, value in (("Status", "Sent"), ("Timestamp", timestamp))])
+    print(f"✅ PECs generated and logged! ({writer.api_calls} batched Sheets write calls)")
 
 # ==== RUN ====
 
 if __name__ == "__main__":
-    generate_bulk_messages()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate PECs for OutreachLeads into the GeneratedPECs sheet.")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Write stage timings and events here (JSON lines; a .prom path gets a Prometheus text file).")
+    parser.add_argument("--mirror-path", default=DEFAULT_MIRROR_PATH,
+                        help="SQLite file for the local copy of OutreachLeads (only changed rows are re-read "
+                             "when the sheet has a modified-time column).")
+    parser.add_argument("--no-mirror", action="store_true", help="Read the whole leads sheet every run.")
+    parser.add_argument("--output-mode", choices=["rewrite", "incremental"], default="rewrite",
+                        help="rewrite: clear and rewrite the whole sheet; incremental: only add/update "
+                             "GeneratedPECs rows whose content changed (adds Lead Key / Content Hash columns).")
+    args = parser.parse_args()
+    if args.metrics_out:
+        telemetry.get().open_sink(args.metrics_out)
+    generate_bulk_messages(mirror=None if args.no_mirror else SheetMirror(args.mirror_path), output_mode=args.output_mode)
+    for line in telemetry.get().summary_lines():
+        print(line)
+    if args.metrics_out:
+        telemetry.get().close()
\ No newline at end of file
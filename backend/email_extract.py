@@ -0,0 +1,96 @@
+# email_extract.py
+"""
+Email extraction for large pages, shared by the scraper CLI and the Streamlit app.
+
+Running EMAIL_RE.findall over a multi-MB page_source is slow: at every start
+position inside a long run of word characters (base64 blobs, JSON ids) the
+regex scans to the end of the run before failing, which is quadratic in the run
+length. Instead we:
+
+ 1. optionally drop <script>/<style> blocks (rendered pages carry the visible
+    contact info in the DOM; the blocks are most of the bytes),
+ 2. undo common obfuscations: "name [at] domain [dot] com", (at)/{at},
+    &#64; / &#x40; entities and JSON-escaped \\u0040,
+ 3. only look around '@' characters: scan at most 64 local-part characters back
+    and match the domain forward from the '@',
+ 4. stop at a per-page time budget and return what was found so far.
+
+Results are unique, in page order, with trailing dots/hyphens trimmed and
+image names like logo@2x.png dropped.
+"""
+import re
+import time
+
+import telemetry
+
+# the original pattern, kept for callers that need plain findall semantics
+EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+
+DEFAULT_BUDGET = 0.5          # seconds per page
+MAX_LOCAL_PART = 64           # RFC 5321 limit; also bounds the backwards scan
+_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.+-")
+_DOMAIN_RE = re.compile(r"[a-zA-Z0-9-]{1,63}\.[a-zA-Z0-9-.]{1,250}")   # DNS label / name limits
+_BLOCK_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+# patterns start with a bracket so the regex engine can skip ahead; surrounding spaces are removed after
+_AT_RE = re.compile(r"[\[\(\{] ?at ?[\]\)\}]", re.I)
+_DOT_RE = re.compile(r"[\[\(\{] ?dot ?[\]\)\}]", re.I)
+_ESCAPED_AT = ("\\u0040", "&#64;", "&#064;", "&#x40;", "&#X40;")
+_IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico")
+_CHECK_EVERY = 256            # '@' candidates between time-budget checks
+
+
+def strip_scripts_and_styles(html):
+    return _BLOCK_RE.sub(" ", html)
+
+
+def deobfuscate(text):
+    """Turn '[at]' / '(dot)' style spellings and escaped '@' back into plain characters."""
+    for escaped in _ESCAPED_AT:
+        if escaped in text:
+            text = text.replace(escaped, "@")
+    if _AT_RE.search(text):
+        text = _AT_RE.sub("@", text).replace(" @ ", "@")
+        text = _DOT_RE.sub(".", text).replace(" . ", ".")
+    return text
+
+
+def extract_emails(text, strip_scripts=False, budget=DEFAULT_BUDGET):
+    """
+    Unique emails in text, in order of appearance.
+    strip_scripts: drop <script>/<style> blocks first (for rendered HTML; not for pages whose
+    contact info only lives in embedded JSON). budget: seconds before giving up on the page.
+    """
+    if not isinstance(text, str):
+        return []
+    with telemetry.timer("regex_extract"):
+        return _extract(text, strip_scripts, budget)
+
+
+def _extract(text, strip_scripts, budget):
+    if strip_scripts:
+        text = strip_scripts_and_styles(text)
+    text = deobfuscate(text)
+    deadline = time.perf_counter() + budget if budget else None
+    found = {}
+    last_end = 0      # matches do not overlap, like findall
+    at = text.find("@")
+    checked = 0
+    while at != -1:
+        checked += 1
+        if deadline is not None and checked % _CHECK_EVERY == 0 and time.perf_counter() > deadline:
+            telemetry.incr("email_extract_budget_exceeded")
+            break
+        start = at
+        floor = max(last_end, at - MAX_LOCAL_PART)
+        while start > floor and text[start - 1] in _LOCAL_CHARS:
+            start -= 1
+        if start == at - MAX_LOCAL_PART and start > last_end and text[start - 1] in _LOCAL_CHARS:
+            start = at    # local part longer than any real address: part of a token, not an email
+        m = _DOMAIN_RE.match(text, at + 1)
+        if start < at and m:
+            email = text[start:m.end()].rstrip(".-")
+            if "." in email[at - start:] and not email.lower().endswith(_IMAGE_SUFFIXES):
+                found.setdefault(email, None)
+            last_end = m.end()
+        at = text.find("@", max(at + 1, last_end))
+    return list(found)
@@ -5,66 +5,95 @@ email_scraper_v2.py
 Usage (CLI):
     python email_scraper_v2.py input.csv                         # IG-only scraping, writes tmp_outreach_output.csv
     python email_scraper_v2.py input.csv /path/to/chromedriver   # IG + FB (Selenium) scraping, writes tmp_outreach_output.csv
+    python email_scraper_v2.py input.csv --concurrency 16        # IG scraping with 16 requests in flight
+    python email_scraper_v2.py big.csv --chunksize 5000          # stream big files, appending each chunk to the output
+    python email_scraper_v2.py input.csv /path/to/chromedriver --fb-workers 4   # 4 Chrome drivers share one FB login
+    python email_scraper_v2.py input.csv /path/to/chromedriver --fb-cookies fb_session.json   # log in once, reuse later
+    python email_scraper_v2.py input.csv /path/to/chromedriver --fb-http   # browser for login only, About pages over HTTP
+    python email_scraper_v2.py input.csv --metrics-out run.jsonl   # per-row events + stage timings (run.prom: Prometheus)
+    python email_scraper_v2.py leads.parquet --output found.parquet --columns Name   # columnar in/out, 4 columns loaded
+    python import_report.py                                      # show where start-up (import) time goes
 
 Behavior:
- - Reads input CSV (expects header row with columns like 'Name', 'IG'/'Instagram'/'IG Link', 'FB'/'Facebook'/'FB Link', and 'Email').
- - For rows missing email, tries IG scraping (requests + BeautifulSoup).
- - If chromedriver path provided, will attempt FB scraping with Selenium (interactive login required).
- - Writes output CSV named tmp_outreach_output.csv with same columns + a "Found Email" column (if original Email column missing) or overwrites Email column in the copy.
+ - Reads the input CSV, Parquet or Feather file (see lead_io; expects a header row with columns like 'Name', 'IG'/'Instagram'/'IG Link', 'FB'/'Facebook'/'FB Link', and 'Email').
+ - For rows missing email, tries IG scraping (pooled requests session, streamed <head> parse of og:description).
+ - If chromedriver path provided, will attempt FB scraping with Selenium (interactive login, unless a saved
+   session from --fb-profile-dir / --fb-cookies is still valid).
+ - Writes --output (default tmp_outreach_output.csv; .parquet / .feather for columnar output) with same columns + a "Found Email" column (if original Email column missing) or overwrites Email column in the copy.
 """
 import sys
 import os
-import csv
 import time
-import re
 import argparse
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-
-# Only import selenium when needed to avoid forcing it on environments that don't need it
-SELENIUM_AVAILABLE = False
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-    SELENIUM_AVAILABLE = True
-except Exception:
-    SELENIUM_AVAILABLE = False
-
-EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
-
-def extract_emails(text):
-    if not isinstance(text, str):
-        return []
-    return EMAIL_RE.findall(text)
+import json
+import queue
+from types import SimpleNamespace
 
-def scrape_instagram_bio(url, timeout=10):
-    """Return list of emails found in IG meta description or empty list."""
-    if not url or pd.isna(url):
-        return []
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=timeout)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        bio_tag = soup.find("meta", property="og:description")
-        if bio_tag and bio_tag.get("content"):
-            return list(dict.fromkeys(extract_emails(bio_tag["content"])))  # preserve uniqueness
-        return []
-    except Exception as e:
-        print(f"[IG] Error scraping {url}: {e}")
-        return []
+# pandas, requests, bs4 and selenium are imported lazily on the code paths that need
+# them, so `--help` and IG-only runs start fast (see import_report.py)
+import http_client
+import lead_io
+import telemetry
+from email_extract import extract_emails
+from profile_urls import dedup_ratio, fb_about_url
+from scrape_core import (NEGATIVE_STATUS_CODES, ScrapeCore, InstagramSource, FacebookSource, dataframe_rows,
+                         detect_columns)
+from scrape_cache import ScrapeCache, DEFAULT_CACHE_PATH, DEFAULT_TTL, DEFAULT_NEGATIVE_TTL, DEFAULT_MAX_ENTRIES
+
+DEFAULT_OUTPUT = "tmp_outreach_output.csv"
+
+# Only import selenium when FB scraping is actually used
+_selenium_modules = None
+
+def load_selenium():
+    """Import selenium on first use; raises RuntimeError if it is not installed."""
+    global _selenium_modules
+    if _selenium_modules is None:
+        try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+            from selenium.webdriver.support.ui import WebDriverWait
+        except Exception as e:
+            raise RuntimeError("Selenium is not installed. Install with: pip install selenium") from e
+        _selenium_modules = SimpleNamespace(webdriver=webdriver, Options=Options, Service=Service,
+                                            WebDriverWait=WebDriverWait)
+    return _selenium_modules
 
 # Selenium FB helpers (only used if chromedriver path passed and selenium is available)
-def init_selenium(chromedriver_path):
-    if not SELENIUM_AVAILABLE:
-        raise RuntimeError("Selenium is not installed. Install with: pip install selenium")
-    chrome_options = Options()
+# URL patterns the fast page-load profile refuses to fetch (images, media, fonts)
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.woff", "*.woff2", "*.ttf", "*.otf",
+]
+
+def init_selenium(chromedriver_path, profile_dir=None, fast_profile=True):
+    """
+    Start Chrome. fast_profile uses the 'eager' page-load strategy (driver.get returns at
+    DOMContentLoaded) and blocks images, media and fonts, which FB scraping never needs.
+    """
+    sel = load_selenium()
+    chrome_options = sel.Options()
     # keep visible for interactive login
     chrome_options.add_argument("--start-maximized")
-    service = Service(chromedriver_path)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    if profile_dir:
+        # persistent Chrome profile: FB login survives between runs
+        chrome_options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    if fast_profile:
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+    service = sel.Service(chromedriver_path)
+    driver = sel.webdriver.Chrome(service=service, options=chrome_options)
+    if fast_profile:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
+        except Exception as e:
+            print(f"[FB] Could not enable resource blocking: {e}")
     return driver
 
 def fb_login_interactive(driver):
@@ -72,145 +101,515 @@ def fb_login_interactive(driver):
     driver.get("https://www.facebook.com/login")
     input("[FB] After logging in, press Enter in this terminal to continue...")
 
-def scrape_facebook_about_selenium(driver, url, wait_seconds=5):
+def fb_session_valid(driver):
+    """True if the browser is logged in to Facebook (c_user cookie set and not bounced to login)."""
+    try:
+        driver.get("https://www.facebook.com/")
+        url = driver.current_url or ""
+        if "/login" in url or "/checkpoint" in url:
+            return False
+        return any(c.get("name") == "c_user" for c in driver.get_cookies())
+    except Exception:
+        return False
+
+def load_fb_cookies(driver, path):
+    """Inject cookies exported by save_fb_cookies. Returns False if there is nothing to load."""
+    if not path or not os.path.exists(path):
+        return False
+    with open(path, encoding="utf-8") as f:
+        cookies = json.load(f)
+    driver.get("https://www.facebook.com/")  # add_cookie only works on the cookie's domain
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            pass
+    return True
+
+def save_fb_cookies(driver, path):
+    """Write the session cookies to path, created readable by the owner only (they are live credentials)."""
+    cookies = driver.get_cookies()
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+        if hasattr(os, "fchmod"):
+            os.fchmod(f.fileno(), 0o600)  # an existing file keeps its old mode on open
+        json.dump(cookies, f)
+
+# runs in the page: true once visible text contains an email, or the document has finished loading
+_FB_READY_JS = (
+    "var t = document.body ? document.body.innerText : '';"
+    "return /[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\\.[a-zA-Z0-9-.]+/.test(t) || document.readyState === 'complete';"
+)
+
+def wait_for_fb_content(driver, timeout):
+    """Return as soon as an email is rendered or the page is ready, waiting at most timeout seconds."""
+    try:
+        load_selenium().WebDriverWait(driver, timeout, poll_frequency=0.2).until(lambda d: d.execute_script(_FB_READY_JS))
+    except Exception:
+        pass  # timed out: scrape whatever has rendered so far
+
+def scrape_facebook_about_selenium(driver, url, wait_seconds=5, cache=None, explicit_wait=True):
+    """
+    wait_seconds: with explicit_wait it is the maximum wait for content; otherwise a fixed sleep
+    after the page load (the old behaviour).
+    """
     try:
         if not url:
             return []
-        if "/about" not in url:
-            url = url.rstrip("/") + "/about"
-        driver.get(url)
-        time.sleep(wait_seconds)  # let dynamic content load
-        html = driver.page_source
-        emails = extract_emails(html)
-        return list(dict.fromkeys(emails))
+        if cache is not None:
+            cached = cache.get("fb", url)
+            if cached is not None:
+                return cached
+        page_url = fb_about_url(url)
+        with telemetry.timer("selenium_load"):
+            driver.get(page_url)
+            if explicit_wait:
+                wait_for_fb_content(driver, wait_seconds)
+            else:
+                time.sleep(wait_seconds)  # let dynamic content load
+            html = driver.page_source
+        # the rendered DOM shows the contact info; scripts/styles are most of page_source
+        emails = extract_emails(html, strip_scripts=True)
+        if cache is not None:
+            cache.put("fb", url, emails)
+        return emails
     except Exception as e:
-        print(f"[FB] Error scraping {url}: {e}")
+        telemetry.error("fb", e, url=url)
+        return []
+
+def fb_page_needs_js(final_url, html):
+    """Heuristic: did the plain HTTP fetch get a login wall / JS shell instead of the About content?"""
+    if "/login" in final_url or "/checkpoint" in final_url:
+        return True
+    if len(html) < 2000:
+        return True
+    lowered = html[:20000].lower()
+    return "<noscript>" in lowered and 'http-equiv="refresh"' in lowered
+
+def scrape_facebook_about_http(url, cookies, client=None, timeout=10, cache=None, user_agent=None):
+    """
+    Fetch a FB About page over the pooled HTTP client using cookies exported from a
+    logged-in Selenium session. Returns a list of emails, or None when the page
+    needs a real browser (login wall / JS-only shell) and Selenium should be used.
+    """
+    if not url:
         return []
+    if cache is not None:
+        cached = cache.get("fb", url)
+        if cached is not None:
+            return cached
+    page_url = fb_about_url(url)
+    headers = {"User-Agent": user_agent} if user_agent else None
+    try:
+        r = (client or http_client.get_client()).get(page_url, timeout=timeout, cookies=cookies, headers=headers)
+        if r.status_code in NEGATIVE_STATUS_CODES:
+            if cache is not None:
+                cache.put("fb", url, [])
+            return []
+        r.raise_for_status()
+    except Exception as e:
+        telemetry.error("fb_http", e, url=url)  # falls back to the browser
+        return None
+    # here the About info may only exist in FB's embedded JSON (name\u0040domain.com, which
+    # extract_emails decodes), so scripts are kept
+    html = r.text
+    emails = extract_emails(html)
+    if not emails and fb_page_needs_js(r.url, html):
+        return None
+    if cache is not None:
+        cache.put("fb", url, emails)
+    return emails
+
+def open_fb_driver(chromedriver_path, profile_dir=None, cookies_path=None, interactive=True, fast_profile=True):
+    """
+    Validate the FB prerequisites and start a logged-in Chrome.
+    A saved session (profile_dir or cookies_path) is reused when still valid;
+    the interactive login only runs when there is none or it has expired.
+    """
+    if not chromedriver_path:
+        raise ValueError("FB scraping requested but no chromedriver_path provided.")
+    load_selenium()  # raises if selenium is not installed
+    if not os.path.exists(chromedriver_path):
+        raise FileNotFoundError(f"chromedriver not found at: {chromedriver_path}")
+    driver = init_selenium(chromedriver_path, profile_dir=profile_dir, fast_profile=fast_profile)
+    if profile_dir or cookies_path:
+        load_fb_cookies(driver, cookies_path)
+        if fb_session_valid(driver):
+            print("[FB] Reusing saved Facebook session.")
+            return driver
+        print("[FB] Saved Facebook session missing or expired.")
+        if not interactive:
+            driver.quit()
+            raise RuntimeError("No valid saved Facebook session and interactive login is disabled.")
+    fb_login_interactive(driver)
+    if cookies_path:
+        save_fb_cookies(driver, cookies_path)
+        print(f"[FB] Saved session cookies to {cookies_path}")
+    return driver
+
+def driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
 
-def detect_columns(df):
-    """Try to auto-detect email, ig, fb columns in a DataFrame."""
-    email_col = None
-    for c in ["Email", "E-mail", "email", "Email Address"]:
-        if c in df.columns:
-            email_col = c
-            break
-    ig_col = None
-    for c in ["IG", "Instagram", "IG Link", "ig_link", "Instagram URL", "instagram"]:
-        if c in df.columns:
-            ig_col = c
-            break
-    fb_col = None
-    for c in ["FB", "Facebook", "FB Link", "facebook_link", "Facebook URL", "fb"]:
-        if c in df.columns:
-            fb_col = c
-            break
-    return email_col, ig_col, fb_col
-
-def run_on_dataframe(df, do_fb=False, chromedriver_path=None, fb_wait_seconds=5, verbose=True):
+class FbDriverPool:
     """
-    df: pandas DataFrame (copy will be created)
+    N Chrome drivers sharing one Facebook session: the first driver logs in (or
+    reuses a saved session, see open_fb_driver), the others get its cookies injected. Drivers are checked
+    out one per FB URL; a driver that died mid-page is quit and replaced (never put back) and the URL
+    retried once.
+    """
+    def __init__(self, chromedriver_path, size=1, profile_dir=None, cookies_path=None, interactive=True,
+                 fast_profile=True):
+        self.chromedriver_path = chromedriver_path
+        self.fast_profile = fast_profile
+        self.size = max(1, int(size))
+        self.restarts = 0
+        self.browser_fallbacks = 0
+        # only the first driver may use profile_dir: Chrome locks a user-data-dir to one process
+        first = open_fb_driver(chromedriver_path, profile_dir=profile_dir, cookies_path=cookies_path,
+                               interactive=interactive, fast_profile=fast_profile)
+        drivers = [first]
+        try:
+            self.cookies = first.get_cookies()
+            try:
+                self.user_agent = first.execute_script("return navigator.userAgent")
+            except Exception:
+                self.user_agent = None
+            for _ in range(self.size - 1):
+                drivers.append(self._new_driver())
+        except BaseException:
+            for driver in drivers:   # do not leave Chrome processes behind
+                _quit(driver)
+            raise
+        self._idle = queue.Queue()
+        for driver in drivers:
+            self._idle.put(driver)
+
+    def _new_driver(self):
+        driver = init_selenium(self.chromedriver_path, fast_profile=self.fast_profile)
+        try:
+            driver.get("https://www.facebook.com/")
+            for cookie in self.cookies:
+                try:
+                    driver.add_cookie(cookie)
+                except Exception:
+                    pass
+        except BaseException:
+            _quit(driver)
+            raise
+        return driver
+
+    def _replace(self, driver):
+        _quit(driver)
+        self.restarts += 1
+        telemetry.incr("fb_driver_restarts")
+        print("[FB] Driver crashed, starting a replacement")
+        return self._new_driver()
+
+    def _checkout(self):
+        driver = self._idle.get()
+        if driver is None:
+            # an earlier replacement failed to start; try again rather than shrink the pool
+            try:
+                driver = self._new_driver()
+            except BaseException:
+                self._idle.put(None)
+                raise
+        return driver
+
+    def scrape(self, url, wait_seconds=5, cache=None):
+        driver = self._checkout()
+        telemetry.gauge("fb_drivers_busy", self.size - self._idle.qsize())
+        try:
+            for _ in range(2):
+                emails = scrape_facebook_about_selenium(driver, url, wait_seconds=wait_seconds, cache=cache,
+                                                        explicit_wait=self.fast_profile)
+                # a WebDriverException is logged and returns []; only a live driver goes back to the pool
+                if emails or driver_alive(driver):
+                    return emails
+                dead, driver = driver, None
+                driver = self._replace(dead)
+            return emails
+        finally:
+            self._idle.put(driver)   # None if the replacement failed: the next checkout retries it
+
+    def http_cookies(self):
+        """Session cookies as a name -> value dict for requests."""
+        return {c["name"]: c["value"] for c in self.cookies if "name" in c and "value" in c}
+
+    def scrape_http_first(self, url, wait_seconds=5, cache=None):
+        """Try the cheap cookie-authenticated HTTP fetch; only fall back to a browser if the page needs JS."""
+        emails = scrape_facebook_about_http(url, self.http_cookies(), cache=cache, user_agent=self.user_agent)
+        if emails is None:
+            self.browser_fallbacks += 1
+            return self.scrape(url, wait_seconds=wait_seconds, cache=cache)
+        return emails
+
+    def close(self):
+        while not self._idle.empty():
+            driver = self._idle.get_nowait()
+            if driver is not None:
+                _quit(driver)
+
+def run_on_dataframe(df, do_fb=False, chromedriver_path=None, fb_wait_seconds=5, verbose=True, concurrency=1,
+                     cache=None, fb_pool=None, fb_workers=1, fb_profile_dir=None, fb_cookies_path=None,
+                     fb_interactive=True, fb_http=False, fb_fast=True, inplace=False, do_ig=True):
+    """
+    df: pandas DataFrame (copy will be created unless inplace=True)
+    do_ig: whether to try Instagram first (--no-ig turns it off)
     do_fb: whether to attempt FB scraping (requires chromedriver_path and selenium)
+    concurrency: number of IG requests kept in flight at once (1 = sequential)
+    cache: optional scrape_cache.ScrapeCache; hit/miss counts for this run are added to stats
+    fb_pool: already logged-in FbDriverPool to reuse (left open); otherwise one with
+             fb_workers drivers is created and closed here
+    fb_profile_dir / fb_cookies_path / fb_interactive: FB login persistence (see open_fb_driver)
+    fb_http: fetch FB About pages over HTTP with the session cookies; browser only for JS-only pages
+    fb_fast: eager page loads without images/media/fonts, and fb_wait_seconds is a maximum wait
+             for content instead of a fixed sleep
+    inplace: write results into df itself instead of a copy (used by the chunked CSV mode)
+    IG/FB links are canonicalized (profile_urls) and each profile is fetched once per call; its
+    result is copied to every row that lists it. stats["dedup_ratio"] is the share of lookups saved.
+    Blank Email cells (NaN in a CSV read by pandas) count as missing.
+    Per-row outcomes, errors, stage timings and queue depths go to telemetry, not stdout.
     Returns: (output_df, stats)
     """
-    out = df.copy()
+    out = df if inplace else df.copy()
     email_col, ig_col, fb_col = detect_columns(df)
     if verbose:
         print(f"[INFO] Detected columns -> email: {email_col}, ig: {ig_col}, fb: {fb_col}")
 
-    # prepare output column
+    # prepare output column; an all-blank Email column (or chunk of one) is read as float64 NaN
     if not email_col:
         out["Found Email"] = ""
+    elif out[email_col].dtype.kind != "O":
+        out[email_col] = out[email_col].astype(object)
+
+    # prepare selenium drivers if needed
+    own_pool = False
+    if do_fb and fb_pool is None:
+        fb_pool = FbDriverPool(chromedriver_path, size=fb_workers, profile_dir=fb_profile_dir,
+                               cookies_path=fb_cookies_path, interactive=fb_interactive, fast_profile=fb_fast)
+        own_pool = True
 
-    # prepare selenium driver if needed
-    driver = None
+    # IG first (cheap HTTP), FB only for rows IG did not resolve; see scrape_core.ScrapeCore
+    sources = []
+    if do_ig:
+        sources.append(InstagramSource(workers=concurrency))
     if do_fb:
-        if not chromedriver_path:
-            raise ValueError("FB scraping requested but no chromedriver_path provided.")
-        if not SELENIUM_AVAILABLE:
-            raise RuntimeError("Selenium package not available. Install `selenium` to use FB scraping.")
-        if not os.path.exists(chromedriver_path):
-            raise FileNotFoundError(f"chromedriver not found at: {chromedriver_path}")
-        driver = init_selenium(chromedriver_path)
-        fb_login_interactive(driver)
-
-    stats = {"rows": len(df), "found_ig": 0, "found_fb": 0, "skipped_already_have_email": 0}
-    for idx, row in df.iterrows():
-        cur_email = str(row.get(email_col, "")).strip() if email_col else str(row.get("Found Email", "")).strip()
-        if cur_email:
-            stats["skipped_already_have_email"] += 1
-            continue
-
-        found = ""
-        # IG scraping first
-        ig_url = row.get(ig_col, "") if ig_col else ""
-        if ig_url and not pd.isna(ig_url):
-            try:
-                ig_emails = scrape_instagram_bio(ig_url)
-                if ig_emails:
-                    found = ig_emails[0]
-                    stats["found_ig"] += 1
-            except Exception as e:
-                if verbose:
-                    print(f"[IG] Row {idx+1} error: {e}")
-
-        # FB scraping fallback if requested and nothing found
-        if not found and do_fb and fb_col:
-            fb_url = row.get(fb_col, "") if fb_col else ""
-            if fb_url and not pd.isna(fb_url):
-                try:
-                    fb_emails = scrape_facebook_about_selenium(driver, fb_url, wait_seconds=fb_wait_seconds)
-                    if fb_emails:
-                        found = fb_emails[0]
-                        stats["found_fb"] += 1
-                except Exception as e:
-                    if verbose:
-                        print(f"[FB] Row {idx+1} error: {e}")
-
-        # write back to output DataFrame
+        sources.append(FacebookSource(fb_pool, http=fb_http, wait_seconds=fb_wait_seconds, workers=concurrency))
+    fallbacks_start = fb_pool.browser_fallbacks if fb_pool is not None else 0
+    rows = dataframe_rows(df, email_col, {"ig": ig_col, "fb": fb_col})
+    try:
+        results, core_stats = ScrapeCore(sources, concurrency=concurrency, cache=cache).run(rows)
+    finally:
+        if own_pool:
+            fb_pool.close()
+
+    # write back only rows that were looked up, in row order
+    for idx, found, source in results:
+        if source == "" and found:
+            continue   # already had an email
         if email_col:
             out.at[idx, email_col] = found
         else:
             out.at[idx, "Found Email"] = found
+        telemetry.event("row", row=idx + 1, email=found, source=source)
 
-        if verbose:
-            if found:
-                print(f"[FOUND] Row {idx+1}: {found}")
-            else:
-                print(f"[MISS] Row {idx+1}: no email found")
+    stats = {"rows": len(df), "found_ig": 0, "found_fb": 0}
+    stats.update(core_stats)
+    if fb_http and fb_pool is not None:
+        stats["fb_browser_fallbacks"] = fb_pool.browser_fallbacks - fallbacks_start
+    return out, stats
 
-    if driver:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+def merge_stats(total, stats):
+    """Add the counters of one run_on_dataframe call into a running total."""
+    for key, value in stats.items():
+        if key != "dedup_ratio":
+            total[key] = total.get(key, 0) + value
+    total["dedup_ratio"] = dedup_ratio(total.get("profile_lookups", 0), total.get("unique_profiles", 0))
+    return total
 
-    return out, stats
+def run_streaming(input_csv, out_path, chunksize, resume=False, do_fb=False, chromedriver_path=None, fb_workers=1,
+                  fb_profile_dir=None, fb_cookies_path=None, fb_interactive=True, fb_fast=True, fb_pool=None,
+                  on_chunk=None, columns=None, **kwargs):
+    """
+    Scrape input_csv (any lead_io format) chunk by chunk, appending each finished chunk to out_path.
+    Only one chunk is held in memory at a time, and an interrupted run keeps every
+    chunk written so far; with resume=True those rows are skipped on the next run
+    (CSV output only: a Parquet / Feather output is started over).
+    fb_pool: an already running FbDriverPool to use (and leave open), e.g. the worker daemon's.
+    columns: load only these input columns (None = all).
+    on_chunk(total_stats) is called after each chunk is written. Returns combined stats.
+    """
+    if resume and not lead_io.appendable(out_path):
+        print(f"[WARN] Cannot resume into {out_path} (not CSV); starting over")
+        resume = False
+    done = lead_io.count_rows(out_path) if resume else 0
+    if done:
+        print(f"[INFO] Resuming: {done} rows already in {out_path}")
+    reader = lead_io.iter_leads(input_csv, chunksize, skip=done, columns=columns)
+    writer = lead_io.LeadWriter(out_path, append=bool(done))
+    own_pool = False
+    if do_fb and fb_pool is None:
+        fb_pool = FbDriverPool(chromedriver_path, size=fb_workers, profile_dir=fb_profile_dir,
+                               cookies_path=fb_cookies_path, interactive=fb_interactive, fast_profile=fb_fast)
+        own_pool = True
+    total = {}
+    try:
+        for chunk in reader:
+            _, stats = run_on_dataframe(chunk, do_fb=do_fb, chromedriver_path=chromedriver_path, fb_pool=fb_pool,
+                                        inplace=True, **kwargs)
+            writer.write(chunk)
+            merge_stats(total, stats)
+            print(f"[INFO] Wrote {total['rows']} rows to {out_path}")
+            if on_chunk is not None:
+                on_chunk(total)
+    finally:
+        writer.close()
+        if own_pool:
+            fb_pool.close()
+    return total
 
 def main_cli():
     parser = argparse.ArgumentParser(description="Email finder for OutreachLeads CSV.")
-    parser.add_argument("input_csv", help="Path to input CSV (OutreachLeads export).")
+    parser.add_argument("input_csv", help="Input leads file: CSV (OutreachLeads export), Parquet or Feather.")
     parser.add_argument("chromedriver", nargs="?", default=None, help="Optional path to chromedriver to enable FB scraping.")
-    parser.add_argument("--fb-wait", type=int, default=5, help="Seconds to wait after FB page load for dynamic content.")
+    parser.add_argument("--fb-wait", type=int, default=5,
+                        help="Max seconds to wait for FB contact info to render (fixed sleep with --fb-full-load).")
+    parser.add_argument("--fb-full-load", action="store_true",
+                        help="Load images/media/fonts and always sleep the full --fb-wait (old behaviour).")
+    parser.add_argument("--fb-workers", type=int, default=1,
+                        help="Number of Chrome drivers scraping FB pages in parallel (one login, shared cookies).")
+    parser.add_argument("--fb-profile-dir", default=None,
+                        help="Chrome user-data-dir to keep the FB login between runs.")
+    parser.add_argument("--fb-cookies", default=None,
+                        help="JSON file to save/restore FB session cookies between runs.")
+    parser.add_argument("--fb-no-interactive", action="store_true",
+                        help="Fail instead of prompting for login when the saved FB session has expired (unattended runs).")
+    parser.add_argument("--fb-http", action="store_true",
+                        help="Use Selenium only to log in; fetch FB About pages over HTTP with the session cookies.")
     parser.add_argument("--no-ig", action="store_true", help="Skip Instagram scraping (not recommended).")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of concurrent IG requests (default 1 = sequential).")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per IG request on timeouts, 429 and 5xx.")
+    parser.add_argument("--output", default=None,
+                        help=f"Result file; .parquet / .feather write columnar output (default {DEFAULT_OUTPUT}).")
+    parser.add_argument("--columns", nargs="*", default=None, metavar="COLUMN",
+                        help="Load only the email / IG / FB columns plus these (the output holds just those); "
+                             "default: every column.")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="Stream the input in chunks of N rows, appending results to the output as they finish.")
+    parser.add_argument("--resume", action="store_true",
+                        help="With --chunksize: skip input rows already present in the output file.")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="SQLite file for the persistent scrape cache.")
+    parser.add_argument("--cache-ttl", type=int, default=DEFAULT_TTL, help="Seconds a found email stays cached.")
+    parser.add_argument("--cache-negative-ttl", type=int, default=DEFAULT_NEGATIVE_TTL,
+                        help="Seconds a 404 / no-email result stays cached.")
+    parser.add_argument("--cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Oldest cache entries are evicted beyond this many.")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the persistent scrape cache.")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Write per-row events, stage timings, errors and queue depths here "
+                             "(JSON lines; a .prom path gets a Prometheus text file).")
+    parser.add_argument("--metrics-format", choices=["jsonl", "prom"], default=None,
+                        help="Override the format picked from the --metrics-out extension.")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split the leads across N processes (each with --concurrency requests in flight) "
+                             "so parsing and extraction use N cores; output keeps the input row order.")
+    parser.add_argument("--submit", action="store_true",
+                        help="Queue the file for a running scrape_worker.py instead of scraping here "
+                             "(a chromedriver argument asks the worker for FB scraping).")
     args = parser.parse_args()
 
     if not os.path.exists(args.input_csv):
-        print(f"[ERROR] input CSV not found: {args.input_csv}")
+        print(f"[ERROR] input file not found: {args.input_csv}")
         sys.exit(2)
-
-    df = pd.read_csv(args.input_csv)
-    print(f"[INFO] Read {len(df)} rows from {args.input_csv}")
+    out_path = args.output or DEFAULT_OUTPUT
+    if args.resume and not lead_io.appendable(out_path):
+        print("[ERROR] --resume needs a CSV --output (Parquet / Feather files cannot be appended to)")
+        sys.exit(2)
+    columns = None
+    if args.columns is not None:
+        try:
+            columns = lead_io.needed_columns(lead_io.read_columns(args.input_csv), keep=args.columns)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(2)
+        print(f"[INFO] Loading columns: {', '.join(columns)}")
 
     do_fb = bool(args.chromedriver)
     do_ig = not args.no_ig
 
+    if args.submit:
+        from scrape_worker import JobQueue, DEFAULT_CHUNKSIZE
+        job_id = JobQueue().submit("csv", args.input_csv, output=args.output,
+                                   options={"fb": do_fb, "ig": do_ig, "chunksize": args.chunksize or DEFAULT_CHUNKSIZE,
+                                            "columns": columns})
+        print(f"[INFO] Queued job {job_id}; check it with: python scrape_worker.py status {job_id}")
+        return
+
+    # pooled keep-alive session, sized so every worker thread gets its own connection
+    http_client.configure(pool_size=max(args.concurrency, 10), max_retries=args.retries)
+
+    cache = None
+    if not args.no_cache:
+        cache = ScrapeCache(args.cache_path, ttl=args.cache_ttl, negative_ttl=args.cache_negative_ttl,
+                            max_entries=args.cache_max_entries)
+
+    fb_opts = dict(chromedriver_path=args.chromedriver, fb_workers=args.fb_workers, fb_profile_dir=args.fb_profile_dir,
+                   fb_cookies_path=args.fb_cookies, fb_interactive=not args.fb_no_interactive,
+                   fb_http=args.fb_http, fb_fast=not args.fb_full_load, fb_wait_seconds=args.fb_wait)
+
+    if args.metrics_out:
+        telemetry.get().open_sink(args.metrics_out, args.metrics_format)
+
+    if args.shards > 1:
+        if args.chunksize > 0:
+            print("[ERROR] --shards cannot be combined with --chunksize")
+            sys.exit(2)
+        from scrape_shards import run_sharded
+        cache_opts = dict(ttl=args.cache_ttl, negative_ttl=args.cache_negative_ttl, max_entries=args.cache_max_entries)
+        out_df, stats = run_sharded(args.input_csv, args.shards, do_fb=do_fb, do_ig=do_ig, concurrency=args.concurrency,
+                                    retries=args.retries, cache_path=None if args.no_cache else args.cache_path,
+                                    cache_opts=cache_opts, columns=columns, **fb_opts)
+        print(f"[DONE] Stats: {stats}")
+        lead_io.write_leads(out_df, out_path)
+        print(f"[INFO] Wrote results to {out_path}")
+        finish_metrics(stats, args.metrics_out)
+        return
+
+    if args.chunksize > 0:
+        stats = run_streaming(args.input_csv, out_path, args.chunksize, resume=args.resume, do_fb=do_fb,
+                              do_ig=do_ig, concurrency=args.concurrency, cache=cache, columns=columns, **fb_opts)
+        print(f"[DONE] Stats: {stats}")
+        finish_metrics(stats, args.metrics_out)
+        return
+
+    df = lead_io.read_leads(args.input_csv, columns=columns)
+    print(f"[INFO] Read {len(df)} rows from {args.input_csv}")
+
     # run IG + optional FB
-    out_df, stats = run_on_dataframe(df, do_fb=do_fb, chromedriver_path=args.chromedriver, fb_wait_seconds=args.fb_wait)
+    out_df, stats = run_on_dataframe(df, do_fb=do_fb, do_ig=do_ig, concurrency=args.concurrency, cache=cache, **fb_opts)
     print(f"[DONE] Stats: {stats}")
 
-    out_path = "tmp_outreach_output.csv"
-    out_df.to_csv(out_path, index=False)
+    lead_io.write_leads(out_df, out_path)
     print(f"[INFO] Wrote results to {out_path}")
+    finish_metrics(stats, args.metrics_out)
+
+def finish_metrics(stats, metrics_out):
+    """Print the per-stage summary and close the telemetry export, if any."""
+    for line in telemetry.get().summary_lines():
+        print(line)
+    if metrics_out:
+        telemetry.get().close(stats=stats)
+        print(f"[INFO] Wrote metrics to {metrics_out}")
 
 if __name__ == "__main__":
     main_cli()
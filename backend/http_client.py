@@ -0,0 +1,117 @@
+# http_client.py
+"""
+Shared HTTP client for the scrapers.
+
+Wraps one requests.Session so every fetch reuses pooled keep-alive connections
+(no new TCP+TLS handshake per profile), asks for gzip, and retries transient
+failures (connection errors, timeouts, 429 and 5xx) with exponential backoff,
+full jitter and Retry-After support.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import telemetry
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    """Return the Retry-After header as seconds (it may be a number or an HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HttpClient:
+    def __init__(self, pool_size=32, max_retries=3, backoff_base=0.5, backoff_max=30.0, timeout=10, headers=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # imported here so that importing this module (e.g. for `--help`) stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._retry_errors = (requests.ConnectionError, requests.Timeout)
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        # retries are done in get() so we control jitter and Retry-After; the adapter only pools
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url, timeout=None, **kwargs):
+        """GET with retries. Returns the last response (caller decides on raise_for_status)."""
+        with telemetry.timer("http_fetch"):
+            return self._get(url, self.timeout if timeout is None else timeout, **kwargs)
+
+    def _get(self, url, timeout, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except self._retry_errors as e:
+                telemetry.error("http_fetch", e, url=url)
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                telemetry.error("http_fetch", f"HTTP {response.status_code}", url=url)
+                delay = self._backoff(attempt, response)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+            return response
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared client, creating it with defaults on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def configure(**kwargs):
+    """Replace the shared client with one built from kwargs (see HttpClient)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = HttpClient(**kwargs)
+        return _default_client
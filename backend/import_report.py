@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+import_report.py
+
+Usage:
+    python import_report.py                      # report for the CLI and app entry modules
+    python import_report.py email_scraper_v2 gspread --top 15
+
+Shows where interpreter start-up time goes: each module is imported in a fresh
+interpreter with `python -X importtime` and the slowest top-level imports are listed.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["email_scraper_v2", "bulk_pec_generator", "pec_render", "http_client", "html_head"]
+
+
+def import_times(module):
+    """Return [(cumulative_us, self_us, depth, name)] for one `import module` in a fresh interpreter."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=here + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, cwd=here)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def direct_imports(rows, module):
+    """
+    The depth-1 rows under module's own depth-0 row. importtime prints children just before their
+    parent, so they are the rows since the previous depth-0 entry; interpreter start-up imports
+    (site, encodings, .pth hooks) are depth-0 entries of their own and are left out.
+    """
+    end = next((i for i, r in enumerate(rows) if r[2] == 0 and r[3] == module), None)
+    if end is None:
+        return []
+    children = []
+    for row in reversed(rows[:end]):
+        if row[2] == 0:
+            break
+        if row[2] == 1:
+            children.append(row)
+    return children
+
+
+def report(module, top=10):
+    try:
+        rows = import_times(module)
+    except RuntimeError as e:
+        print(f"[IMPORT] {module}: cannot import ({e})")
+        return
+    total = next((r[0] for r in rows if r[3] == module), sum(r[1] for r in rows))
+    print(f"[IMPORT] {module}: {total / 1000:.1f} ms total")
+    direct = sorted(direct_imports(rows, module), reverse=True)[:top]
+    for cumulative, _, _, name in direct:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import-time cost of the project's entry modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to measure.")
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest direct imports to list.")
+    args = parser.parse_args()
+    for module in args.modules:
+        report(module, top=args.top)
+
+
+if __name__ == "__main__":
+    main()
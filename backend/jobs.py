@@ -0,0 +1,132 @@
+# jobs.py
+"""
+Background jobs for the Streamlit app.
+
+A Job walks a list of items on its own thread, batch_size items at a time,
+calling fn(batch, log) -> list of results (one per item). Results accumulate
+as it goes, so callers can show partial output while it runs. cancel() stops
+the job after the current batch; resume() picks up where it stopped, or
+withdraws the cancel if that batch is still running.
+
+Jobs live in a JobRegistry that the app keeps as a cached resource, so they
+survive Streamlit reruns.
+"""
+import threading
+import time
+import uuid
+
+
+class Job:
+    def __init__(self, label, items, fn, batch_size=1, key=None, on_done=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.label = label
+        self.key = key
+        self.items = list(items)
+        self.fn = fn
+        self.batch_size = max(1, int(batch_size))
+        self.on_done = on_done
+        self.results = []
+        self.log = []
+        self.meta = {}
+        self.status = "pending"   # pending -> running -> done / cancelled / failed
+        self.error = None
+        self._elapsed = 0.0       # seconds spent in finished runs
+        self._run_started = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()   # cancel check vs. resume
+        self._thread = None
+
+    @property
+    def total(self):
+        return len(self.items)
+
+    @property
+    def done(self):
+        return len(self.results)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def cancelling(self):
+        """Cancel requested, but the current batch has not finished yet."""
+        return self.running and self._cancel.is_set()
+
+    def start(self):
+        with self._lock:
+            if self.status == "done":
+                return
+            if self.status == "running" and self.running:
+                self._cancel.clear()   # still in its batch: keep going
+                return
+        if self._thread is not None:
+            self._thread.join()        # stopped, only its bookkeeping is left
+        self._cancel.clear()
+        self.status = "running"
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=f"job-{self.id}", daemon=True)
+        self._thread.start()
+
+    resume = start
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        self._run_started = time.time()
+        try:
+            while self.done < self.total:
+                with self._lock:
+                    if self._cancel.is_set():
+                        self.status = "cancelled"
+                        return
+                batch = self.items[self.done:self.done + self.batch_size]
+                out = self.fn(batch, self.log.append)
+                self.results.extend(out)
+            self.status = "done"
+            if self.on_done is not None:
+                self.on_done(self)
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            self.log.append(f"Job failed: {e}")
+        finally:
+            self._elapsed += time.time() - self._run_started
+            self._run_started = None
+
+    def elapsed(self):
+        current = time.time() - self._run_started if self._run_started else 0.0
+        return self._elapsed + current
+
+    def rate(self):
+        """Items per second over all runs so far."""
+        elapsed = self.elapsed()
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        """Seconds left at the current rate, or None if unknown."""
+        rate = self.rate()
+        if rate <= 0:
+            return None
+        return (self.total - self.done) / rate
+
+
+class JobRegistry:
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def add(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def find(self, key):
+        """Most recent job submitted with this key, if any."""
+        with self._lock:
+            matches = [j for j in self._jobs.values() if j.key == key]
+        return matches[-1] if matches else None
@@ -0,0 +1,224 @@
+# lead_io.py
+"""
+Lead files in CSV, Parquet or Feather (Arrow IPC).
+
+The format follows the file extension (see FORMATS; anything else is CSV).
+Parquet and Feather store column types, so nothing is re-inferred on load,
+and both can load a subset of columns without reading the others; CSV skips
+the unused columns while parsing (usecols). needed_columns() picks the email
+/ IG / FB columns the scraper works on, plus any the caller wants to keep.
+
+Parquet and Feather need pyarrow (pip install pyarrow); CSV does not.
+"""
+import csv
+import io
+import os
+
+from scrape_core import EMAIL_COLUMNS, IG_COLUMNS, FB_COLUMNS
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet",
+           ".feather": "feather", ".arrow": "feather", ".ipc": "feather"}
+EXTENSIONS = {"csv": "csv", "parquet": "parquet", "feather": "feather"}
+MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet",
+              "feather": "application/vnd.apache.arrow.file"}
+UPLOAD_TYPES = [ext.lstrip(".") for ext in FORMATS]
+
+
+def lead_format(name):
+    """"csv", "parquet" or "feather" for a file name or path (CSV when the extension is unknown)."""
+    return FORMATS.get(os.path.splitext(str(name))[1].lower(), "csv")
+
+
+def _pyarrow(fmt):
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError(f"{fmt} lead files need pyarrow. Install with: pip install pyarrow") from None
+    return pyarrow
+
+
+def _format_of(source, fmt):
+    return fmt or (lead_format(source) if isinstance(source, (str, os.PathLike)) else "csv")
+
+
+def read_columns(source, fmt=None):
+    """Column names of a lead file, read from the CSV header line or the Parquet / Feather schema."""
+    fmt = _format_of(source, fmt)
+    position = source.tell() if hasattr(source, "tell") else None
+    try:
+        if fmt == "csv":
+            import pandas as pd
+            return list(pd.read_csv(source, nrows=0).columns)
+        _pyarrow(fmt)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            return list(pq.read_schema(source).names)
+        import pyarrow.ipc as ipc
+        return list(ipc.open_file(source).schema.names)
+    finally:
+        if position is not None:
+            source.seek(position)
+
+
+def needed_columns(columns, keep=()):
+    """
+    The columns the scraper needs out of columns (first email / IG / FB match, like
+    detect_columns) plus keep, in file order. Raises ValueError for a keep column the file lacks.
+    """
+    missing = [c for c in keep if c not in columns]
+    if missing:
+        raise ValueError(f"column(s) not in the lead file: {', '.join(missing)}")
+    wanted = set(keep)
+    for candidates in (EMAIL_COLUMNS, IG_COLUMNS, FB_COLUMNS):
+        found = next((c for c in candidates if c in columns), None)
+        if found:
+            wanted.add(found)
+    return [c for c in columns if c in wanted]
+
+
+def read_leads(source, fmt=None, columns=None):
+    """DataFrame of a lead file (path or file object); columns=None loads every column."""
+    import pandas as pd
+    fmt = _format_of(source, fmt)
+    if fmt == "csv":
+        return pd.read_csv(source, usecols=columns)
+    _pyarrow(fmt)
+    if fmt == "parquet":
+        return pd.read_parquet(source, columns=columns)
+    return pd.read_feather(source, columns=columns)
+
+
+def iter_leads(path, chunksize, skip=0, columns=None, fmt=None):
+    """Yield the rows of a lead file after the first `skip` as DataFrames of up to chunksize rows."""
+    import pandas as pd
+    fmt = _format_of(path, fmt)
+    if fmt == "csv":
+        # skip data rows but keep the header line (line 0)
+        yield from pd.read_csv(path, chunksize=chunksize, skiprows=range(1, skip + 1), usecols=columns)
+        return
+    _pyarrow(fmt)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        position = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            start = max(0, skip - position)
+            position += batch.num_rows
+            if start < batch.num_rows:
+                yield batch.slice(start).to_pandas()
+        return
+    import pyarrow.feather as feather
+    # memory-mapped: only the slice being converted is materialised
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    for offset in range(skip, table.num_rows, chunksize):
+        yield table.slice(offset, chunksize).to_pandas()
+
+
+def count_rows(path, fmt=None):
+    """Number of data rows in a lead file (0 if it does not exist); Parquet / Feather read only metadata."""
+    if not os.path.exists(path):
+        return 0
+    fmt = _format_of(path, fmt)
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return max(0, sum(1 for _ in csv.reader(f)) - 1)
+    _pyarrow(fmt)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def write_leads(df, target, fmt=None):
+    """Write df (without its index) to a path or binary file object."""
+    fmt = _format_of(target, fmt)
+    if fmt == "csv":
+        df.to_csv(target, index=False)
+        return
+    _pyarrow(fmt)
+    if fmt == "parquet":
+        df.to_parquet(target, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(target)
+
+
+def to_bytes(df, fmt):
+    """df as file contents in fmt, e.g. for a download button."""
+    buffer = io.BytesIO()
+    write_leads(df, buffer, fmt)
+    return buffer.getvalue()
+
+
+def appendable(path, fmt=None):
+    """True if LeadWriter(append=True) can continue this file (CSV only)."""
+    return _format_of(path, fmt) == "csv"
+
+
+class LeadWriter:
+    """
+    Writes DataFrame chunks to one lead file as they finish. A CSV can continue an existing
+    file (append=True); Parquet / Feather files are only readable after close().
+    """
+
+    def __init__(self, path, fmt=None, append=False):
+        self.path = path
+        self.format = _format_of(path, fmt)
+        if append and not appendable(path, self.format):
+            raise ValueError(f"cannot append to a {self.format} file: {path}")
+        self._append = append and os.path.exists(path)
+        self._writer = None
+        self._schema = None
+        if self.format != "csv":
+            _pyarrow(self.format)
+
+    def write(self, df):
+        if self.format == "csv":
+            df.to_csv(self.path, mode="a" if self._append else "w", header=not self._append, index=False)
+            self._append = True
+            return
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._schema = self._first_schema(table)
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, self._schema)
+        self._writer.write_table(self._conform(table))
+
+    @staticmethod
+    def _first_schema(table):
+        """Schema of the first chunk; a column empty in it (read as float / null) is stored as text."""
+        import pyarrow as pa
+        fields = []
+        for field in table.schema:
+            empty = len(table) and table.column(field.name).null_count == len(table)
+            if empty and (pa.types.is_floating(field.type) or pa.types.is_null(field.type)):
+                field = pa.field(field.name, pa.string())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def _conform(self, table):
+        """Cast a chunk to the first chunk's schema (pandas infers column types per chunk)."""
+        import pyarrow as pa
+        arrays = []
+        for field in self._schema:
+            column = table.column(field.name)
+            if column.type != field.type:
+                if column.null_count == len(column):
+                    column = pa.nulls(len(column), field.type)
+                else:
+                    try:
+                        column = column.cast(field.type)
+                    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                        raise ValueError(f"column {field.name!r} changed type between chunks ({field.type} -> "
+                                         f"{column.type}); write CSV output or drop --chunksize") from None
+            arrays.append(column)
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,99 @@
+# pec_output.py
+"""
+Incremental GeneratedPECs output.
+
+The output worksheet keeps one row per lead: Name, Generated PEC, Lead Key,
+Content Hash (see pec_render.lead_keys / content_hashes). Instead of clearing
+and rewriting the sheet every run, prepare_upsert() reads the header and the
+two key columns in one call and sorts the new rows into:
+
+ - appends: leads not in the sheet yet
+ - cells:   Generated PEC + Content Hash of leads whose inputs or template changed
+ - unchanged rows, which cost no API calls at all
+
+A sheet in the old two-column layout is cleared once and rewritten in the new one.
+Callers opt in (bulk_pec_generator --output-mode incremental); rewriting the
+sheet is the default.
+"""
+import telemetry
+
+OUTPUT_HEADERS = ["Name", "Generated PEC", "Lead Key", "Content Hash"]
+_PEC_COL = OUTPUT_HEADERS.index("Generated PEC") + 1
+_HASH_COL = OUTPUT_HEADERS.index("Content Hash") + 1
+
+
+def output_rows(out, keys, hashes):
+    """[Name, Generated PEC, Lead Key, Content Hash] per rendered row; out is pec_render.render_pecs output."""
+    return [[name, message, keys[idx], hashes[idx]]
+            for idx, name, message in zip(out.index, out["Name"], out["Generated PEC"])]
+
+
+def read_index(ws):
+    """(state, {lead key: (sheet row, content hash)}); state is "ok", "empty" or "legacy"."""
+    with telemetry.timer("sheets_read"):
+        header, keys = ws.batch_get(["A1:D1", "C2:D"])
+    header = list(header[0]) if header else []
+    if header == OUTPUT_HEADERS:
+        index = {}
+        for i, cells in enumerate(keys):
+            if cells and cells[0]:
+                index[cells[0]] = (i + 2, cells[1] if len(cells) > 1 else "")
+        return "ok", index
+    return ("legacy" if header else "empty"), {}
+
+
+def distinct_keys(rows):
+    """
+    rows with repeated lead keys made unique: the second row with a key gets key#2, the third
+    key#3 and so on, in row order, so leads listed twice keep a row each.
+    """
+    seen = {}
+    out = []
+    for row in rows:
+        n = seen[row[2]] = seen.get(row[2], 0) + 1
+        out.append(row if n == 1 else row[:2] + [f"{row[2]}#{n}"] + row[3:])
+    repeated = sum(n - 1 for n in seen.values())
+    if repeated:
+        print(f"[PEC] {repeated} rows repeat an earlier lead's Name/IG/FB/Event/Date; "
+              "keyed by their position among those rows (key#2, #3, ...)")
+    return out
+
+
+def plan_upsert(rows, index):
+    """Split rows into (appends, cells, unchanged) against index; every row is kept (see distinct_keys)."""
+    appends, cells, unchanged = [], [], 0
+    for row in distinct_keys(rows):
+        found = index.get(row[2])
+        if found is None:
+            appends.append(row)
+        elif found[1] != row[3]:
+            cells += [(found[0], _PEC_COL, row[1]), (found[0], _HASH_COL, row[3])]
+        else:
+            unchanged += 1
+    return appends, cells, unchanged
+
+
+def prepare_upsert(ws, rows):
+    """
+    Read the output sheet's index and plan the writes. Clears a legacy-layout sheet and puts
+    the header row first in appends when the sheet has none. Returns (appends, cells, stats).
+    """
+    state, index = read_index(ws)
+    if state == "legacy":
+        print("[PEC] GeneratedPECs is in the old layout; rewriting it once with lead keys")
+        ws.clear()
+    appends, cells, unchanged = plan_upsert(rows, index)
+    stats = {"appended": len(appends), "updated": len(cells) // 2, "unchanged": unchanged}
+    if state != "ok":
+        appends = [OUTPUT_HEADERS] + appends
+    return appends, cells, stats
+
+
+def upsert_pecs(ws, rows, writer):
+    """Queue the incremental writes for rows on a SheetsBatchWriter (caller flushes). Returns stats."""
+    appends, cells, stats = prepare_upsert(ws, rows)
+    for row in appends:
+        writer.append_row(ws, row)
+    for cell in cells:
+        writer.update_cell(ws, *cell)
+    return stats
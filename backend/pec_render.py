@@ -0,0 +1,156 @@
+# pec_render.py
+"""
+Vectorized PEC rendering.
+
+Each template is compiled once into literal/field parts (string.Formatter().parse),
+the identity fields (your_name, city, brand, portfolio) are folded into the
+literals, and every tag group is then rendered with whole-column string
+concatenation instead of one str.format call per row.
+
+lead_keys / content_hashes key the rows of the incremental GeneratedPECs
+output (see pec_output).
+"""
+import hashlib
+from functools import lru_cache
+from string import Formatter
+
+import pandas as pd
+
+# template field -> lead column it is read from
+ROW_FIELDS = {"artist_name": "Name", "event": "Event", "venue": "Venue", "date": "Date"}
+SKIP_STATUSES = ["sent", "replied"]
+
+
+class CompiledTemplate:
+    def __init__(self, template):
+        self.template = template
+        self.parts = []          # list of (literal, field name or None)
+        self.simple = True       # False if any field uses a conversion/format spec or attribute access
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if field is not None and (spec or conversion or not field.isidentifier()):
+                self.simple = False
+            self.parts.append((literal, field))
+
+    def bind(self, config):
+        """Fold constant (identity) fields into the literals; returns list of str / column-field parts."""
+        bound = []
+        for literal, field in self.parts:
+            if literal:
+                bound.append(literal)
+            if field is None:
+                continue
+            if field in ROW_FIELDS:
+                bound.append((field,))
+            elif field in config:
+                bound.append(str(config[field]))
+            else:
+                raise KeyError(field)
+        # merge adjacent literals so each row pays for as few concatenations as possible
+        merged = []
+        for part in bound:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            else:
+                merged.append(part)
+        return merged
+
+    def render(self, columns, config):
+        """columns: dict field -> Series of str (all sharing one index). Returns Series of messages."""
+        index = next(iter(columns.values())).index
+        if not self.simple:
+            data = [dict(config, **{f: columns[f].iloc[i] for f in columns}) for i in range(len(index))]
+            return pd.Series([self.template.format(**d) for d in data], index=index, dtype=object)
+        out = pd.Series("", index=index, dtype=object)
+        for part in self.bind(config):
+            out = out + (part if isinstance(part, str) else columns[part[0]])
+        return out
+
+
+@lru_cache(maxsize=32)
+def _compile(items):
+    return {tag: CompiledTemplate(text) for tag, text in items}
+
+
+def compile_templates(templates):
+    """Compile a {tag: template} dict once; repeated calls with the same templates hit a cache."""
+    return _compile(tuple(sorted(templates.items())))
+
+
+def _text(df, col):
+    """Column as str the way str.format would show it ('' if the column is missing)."""
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[col].map(str).astype(object)
+
+
+def names(df):
+    """Name column as-is (for output rows), '' if missing."""
+    if "Name" not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df["Name"]
+
+
+def pending_mask(df):
+    """Rows whose Status is not sent/replied."""
+    return ~_text(df, "Status").str.strip().str.lower().isin(SKIP_STATUSES)
+
+
+def tags(df):
+    return _text(df, "Tag").str.strip()
+
+
+def render_pecs(df, templates, config, on_error=None):
+    """
+    Render PECs for every pending row whose Tag has a template.
+    Returns a DataFrame [Name, Generated PEC] indexed like df, in df order.
+    on_error(tag, exc) -> str lets callers substitute a message when a template
+    cannot be rendered; without it the exception propagates.
+    """
+    compiled = compile_templates(templates)
+    row_tags = tags(df)
+    mask = pending_mask(df) & row_tags.isin(list(compiled))
+    todo = df[mask]
+    todo_tags = row_tags[mask]
+    columns = {field: _text(todo, col) for field, col in ROW_FIELDS.items()}
+    messages = pd.Series("", index=todo.index, dtype=object)
+    for tag, group_index in todo_tags.groupby(todo_tags, sort=False).groups.items():
+        group_cols = {field: col.loc[group_index] for field, col in columns.items()}
+        try:
+            messages.loc[group_index] = compiled[tag].render(group_cols, config)
+        except Exception as e:
+            if on_error is None:
+                raise
+            messages.loc[group_index] = on_error(tag, e)
+    return pd.DataFrame({"Name": names(todo), "Generated PEC": messages}, index=todo.index)
+
+
+# columns that identify one lead (one outreach) across runs, and the hash of what its PEC is made from
+LEAD_KEY_COLUMNS = ["Name", "IG", "FB", "Event", "Date"]
+_SEP = "\x1f"
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def lead_keys(df):
+    """Stable per-row lead id: hash of the LEAD_KEY_COLUMNS values, stripped and lowercased."""
+    joined = pd.Series("", index=df.index, dtype=object)
+    for col in LEAD_KEY_COLUMNS:
+        joined = joined + _text(df, col).str.strip().str.lower() + _SEP
+    return joined.map(_digest)
+
+
+def content_hashes(df, templates, config):
+    """
+    Per-row hash of everything the PEC depends on: the row's template text, the identity settings
+    and the row fields that template uses (so editing a field it ignores changes nothing).
+    """
+    compiled = compile_templates(templates)
+    template_ids = {tag: _digest(text) for tag, text in templates.items()}
+    row_tags = tags(df)
+    joined = row_tags.map(lambda tag: template_ids.get(tag, "")) + _SEP + _digest(repr(sorted(config.items())))
+    for field, col in ROW_FIELDS.items():
+        users = [tag for tag, t in compiled.items() if any(f == field for _, f in t.parts)]
+        joined = joined + _SEP + _text(df, col).where(row_tags.isin(users), "")
+    return joined.map(_digest)
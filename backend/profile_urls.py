@@ -0,0 +1,102 @@
+# profile_urls.py
+"""
+Canonical IG / FB profile URLs, so one profile listed several ways in a lead
+sheet (www./m. hosts, http vs https, trailing slashes, query strings, /about,
+different letter case, bare @handles) is fetched and cached once.
+
+    canonicalize_ig_url("http://instagram.com/DJ.Foo?igshid=abc")  -> "https://www.instagram.com/dj.foo/"
+    canonicalize_fb_url("https://m.facebook.com/TheVenue/about/")  -> "https://www.facebook.com/thevenue"
+    fb_about_url("https://www.facebook.com/profile.php?id=42")      -> "https://www.facebook.com/profile.php?id=42&sk=about"
+
+Both return None for blank values. Links to other hosts are only tidied
+(lowercase host, no www., query or fragment, trailing slash).
+"""
+import math
+import re
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+IG_HOSTS = ("instagram.com", "instagr.am")
+FB_HOSTS = ("facebook.com", "fb.com", "fb.me")
+_HOST_PREFIXES = ("www.", "m.", "mobile.", "web.", "business.")
+# FB About sub-pages; the scrapers add /about themselves (fb_about_url)
+_FB_ABOUT_RE = re.compile(r"/about(_[a-z_]+)?$")
+_HANDLE_RE = re.compile(r"^@?[A-Za-z0-9._]+$")
+
+
+def _blank(url):
+    return url is None or (isinstance(url, float) and math.isnan(url)) or not str(url).strip()
+
+
+def _split(url):
+    """urlsplit that tolerates missing schemes; returns (host without www./m., path)."""
+    url = str(url).strip()
+    if "://" not in url:
+        url = "https://" + url.lstrip("/")
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return parts, host
+
+
+def _tidy(parts, host):
+    path = parts.path.rstrip("/")
+    try:
+        port = f":{parts.port}" if parts.port else ""
+    except ValueError:   # junk after the colon
+        port = ""
+    return f"{parts.scheme.lower() or 'https'}://{host}{port}{path}"
+
+
+def canonicalize_ig_url(url):
+    if _blank(url):
+        return None
+    text = str(url).strip()
+    if text.startswith("@") or (_HANDLE_RE.match(text) and "." not in text):   # bare handle
+        return f"https://www.instagram.com/{text.lstrip('@').lower()}/"
+    parts, host = _split(text)
+    if host not in IG_HOSTS:
+        return _tidy(parts, host)
+    segments = [s for s in parts.path.split("/") if s]
+    if not segments:
+        return "https://www.instagram.com/"
+    if segments[0] in ("p", "reel", "tv", "stories", "explore"):
+        # not a profile page; keep the path, only drop query and host variants
+        return "https://www.instagram.com/" + "/".join(segments) + "/"
+    return f"https://www.instagram.com/{segments[0].lower()}/"
+
+
+def canonicalize_fb_url(url):
+    if _blank(url):
+        return None
+    parts, host = _split(url)
+    path = _FB_ABOUT_RE.sub("", parts.path.rstrip("/"))
+    if host not in FB_HOSTS:
+        return _tidy(parts._replace(path=path), host)
+    if path.lower() == "/profile.php":
+        # numeric profiles are identified by ?id=, every other query parameter is tracking
+        profile_id = parse_qs(parts.query).get("id", [""])[0]
+        return "https://www.facebook.com/profile.php" + (f"?id={profile_id}" if profile_id else "")
+    return "https://www.facebook.com" + _FB_ABOUT_RE.sub("", path.lower())
+
+
+def fb_about_url(url):
+    """
+    The About page of a FB profile URL. Vanity profiles get /about on the path; numeric
+    profile.php?id= profiles take it as the sk=about query parameter instead.
+    """
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/")
+    if _FB_ABOUT_RE.search(path) or parse_qs(parts.query).get("sk", [""])[0].startswith("about"):
+        return url
+    if path.lower().endswith("/profile.php"):
+        query = f"{parts.query}&sk=about" if parts.query else "sk=about"
+        return urlunsplit(parts._replace(query=query, fragment=""))
+    return urlunsplit(parts._replace(path=path + "/about", fragment=""))
+
+
+def dedup_ratio(lookups, unique):
+    """Share of lookups saved because an earlier row had the same canonical profile (0.0 - 1.0)."""
+    return round(1 - unique / lookups, 4) if lookups else 0.0
@@ -0,0 +1,93 @@
+# scrape_cache.py
+"""
+Persistent URL-keyed cache for scrape results, backed by SQLite.
+
+Each entry maps (source, url) -> list of emails found. An empty list is a valid
+("negative") entry: the profile exists but had no email, or it returned 404/410.
+Negative entries get their own (shorter) TTL so dead ends are retried eventually.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get("SCRAPE_CACHE_PATH", "scrape_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600           # positive results: 7 days
+DEFAULT_NEGATIVE_TTL = 24 * 3600      # no email / 404: 1 day
+DEFAULT_MAX_ENTRIES = 200_000
+_EVICT_EVERY = 500                    # check size bound every N writes
+
+
+class ScrapeCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        # one connection shared by the worker threads, serialised through self._lock; the timeout
+        # covers other processes (scrape shards, the worker daemon) writing the same file
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scrape_cache ("
+            " source TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " emails TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (source, url))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scrape_cache_age ON scrape_cache (fetched_at)")
+        self._conn.commit()
+
+    def get(self, source, url):
+        """Return cached list of emails, or None on a miss / expired entry."""
+        key = str(url).strip()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT emails, fetched_at FROM scrape_cache WHERE source = ? AND url = ?", (source, key)
+            ).fetchone()
+            if row is not None:
+                emails = json.loads(row[0])
+                ttl = self.ttl if emails else self.negative_ttl
+                if time.time() - row[1] <= ttl:
+                    self.hits += 1
+                    return emails
+            self.misses += 1
+            return None
+
+    def put(self, source, url, emails):
+        key = str(url).strip()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (source, url, emails, fetched_at) VALUES (?, ?, ?, ?)",
+                (source, key, json.dumps(list(emails)), time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        """Drop the oldest entries beyond max_entries (caller holds the lock)."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM scrape_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM scrape_cache WHERE rowid IN "
+                "(SELECT rowid FROM scrape_cache ORDER BY fetched_at ASC LIMIT ?)",
+                (excess,),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,221 @@
+# scrape_core.py
+"""
+Scraping core shared by the CLI (email_scraper_v2) and the Streamlit app.
+
+A ScrapeCore runs rows through an ordered list of sources (IG, then FB, ...):
+each row is looked up in the first source it has a link for, and only rows
+still without an email move on to the next one. Every source has its own
+bounded thread pool, links are canonicalized so each profile is fetched once
+(results are remembered across run() calls), and the optional ScrapeCache is
+consulted by the sources themselves.
+
+A source is any object with:
+    name                    short id used in stats / telemetry ("ig", "fb")
+    workers                 thread pool size (None = the core's concurrency)
+    canonicalize(url)       canonical URL or None for blank/unusable links
+    lookup(url, cache)      list of emails (may raise; counted as an error)
+"""
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+import telemetry
+from email_extract import extract_emails
+from html_head import fetch_og_description
+from profile_urls import canonicalize_ig_url, canonicalize_fb_url, dedup_ratio
+
+EMAIL_COLUMNS = ["Email", "E-mail", "email", "Email Address"]
+IG_COLUMNS = ["IG", "Instagram", "IG Link", "ig_link", "Instagram URL", "instagram"]
+FB_COLUMNS = ["FB", "Facebook", "FB Link", "facebook_link", "Facebook URL", "fb"]
+
+# 404/410 mean the profile is gone; safe to remember as a negative result
+NEGATIVE_STATUS_CODES = (404, 410)
+
+
+def is_blank(value):
+    """True for None, '' and NaN (what pd.isna covered here, without importing pandas)."""
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    if type(value).__name__ in ("NAType", "NaTType"):  # pd.NA / pd.NaT
+        return True
+    return isinstance(value, str) and not value
+
+
+def cell_text(value):
+    """Cell as stripped text, '' for blanks (so an empty Email read as NaN is not the string 'nan')."""
+    return "" if is_blank(value) else str(value).strip()
+
+
+def detect_columns(df):
+    """Try to auto-detect email, ig, fb columns in a DataFrame."""
+    def first(candidates):
+        return next((c for c in candidates if c in df.columns), None)
+    return first(EMAIL_COLUMNS), first(IG_COLUMNS), first(FB_COLUMNS)
+
+
+def dataframe_rows(df, email_col, columns):
+    """(index, current email, {source name: link}) per row; columns maps source name -> column (or None)."""
+    rows = []
+    for idx, row in df.iterrows():
+        links = {name: row.get(col) for name, col in columns.items() if col}
+        rows.append((idx, cell_text(row.get(email_col)) if email_col else "", links))
+    return rows
+
+
+def scrape_instagram_bio(url, timeout=10, cache=None, client=None, warn=None):
+    """Return list of emails found in IG meta description or empty list."""
+    if is_blank(url):
+        return []
+    if cache is not None:
+        cached = cache.get("ig", url)
+        if cached is not None:
+            return cached
+    try:
+        # streams the page and stops reading at the og:description tag / end of <head>
+        bio = fetch_og_description(client or http_client.get_client(), url, timeout=timeout)
+        emails = []
+        if bio:
+            emails = extract_emails(bio)
+        if cache is not None:
+            cache.put("ig", url, emails)
+        return emails
+    except Exception as e:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        if cache is not None and status in NEGATIVE_STATUS_CODES:
+            cache.put("ig", url, [])
+        telemetry.error("ig", e, url=url, status=status)
+        if warn is not None:
+            warn(f"IG scrape error for {url}: {e}")
+        return []
+
+
+class InstagramSource:
+    name = "ig"
+
+    def __init__(self, client=None, timeout=10, workers=None, warn=None):
+        self.client = client
+        self.timeout = timeout
+        self.workers = workers
+        self.warn = warn
+
+    def canonicalize(self, url):
+        return canonicalize_ig_url(url)
+
+    def lookup(self, url, cache):
+        return scrape_instagram_bio(url, timeout=self.timeout, cache=cache, client=self.client, warn=self.warn)
+
+
+class FacebookSource:
+    """FB About pages through a driver pool (email_scraper_v2.FbDriverPool or anything with its scrape methods)."""
+    name = "fb"
+
+    def __init__(self, pool, http=False, wait_seconds=5, workers=None):
+        self.pool = pool
+        self.http = http
+        self.wait_seconds = wait_seconds
+        # one thread per driver; cookie-authenticated HTTP fetches can use more
+        self.workers = max(pool.size, workers or 1) if http else pool.size
+
+    def canonicalize(self, url):
+        return canonicalize_fb_url(url)
+
+    def lookup(self, url, cache):
+        if self.http:
+            return self.pool.scrape_http_first(url, self.wait_seconds, cache)
+        return self.pool.scrape(url, self.wait_seconds, cache)
+
+
+class ScrapeCore:
+    def __init__(self, sources, concurrency=1, cache=None):
+        self.sources = list(sources)
+        self.concurrency = max(1, int(concurrency))
+        self.cache = cache
+        self._known = [{} for _ in self.sources]   # per source: canonical URL -> emails, across runs
+
+    def run(self, rows, on_error=None):
+        """
+        rows: list of (key, current email, {source name: link}). Rows that already have an
+        email are passed through. Returns ([(key, email, source name or "")] in row order, stats).
+        on_error(message) is called for lookups that raised.
+        """
+        stats = {"rows": len(rows)}
+        for source in self.sources:
+            stats[f"found_{source.name}"] = 0
+        stats.update(skipped_already_have_email=0, profile_lookups=0, unique_profiles=0)
+        cache_start = self.cache.stats() if self.cache is not None else None
+
+        results = {}
+        executors = [ThreadPoolExecutor(max_workers=s.workers or self.concurrency) for s in self.sources]
+        futures = [{} for _ in self.sources]    # this run's in-flight lookups per source
+        in_flight = [0] * len(self.sources)
+        lock = threading.Lock()
+
+        def queue_add(i, n):
+            with lock:
+                in_flight[i] += n
+                telemetry.gauge(f"{self.sources[i].name}_queue_depth", in_flight[i])
+
+        def submit(start, links):
+            """Queue the row's lookup in the first source from `start` it has a link for -> (i, url) or None."""
+            for i in range(start, len(self.sources)):
+                url = self.sources[i].canonicalize(links.get(self.sources[i].name))
+                if not url:
+                    continue
+                stats["profile_lookups"] += 1
+                if url not in futures[i] and url not in self._known[i]:
+                    stats["unique_profiles"] += 1
+                    queue_add(i, 1)
+                    futures[i][url] = executors[i].submit(self.sources[i].lookup, url, self.cache)
+                    futures[i][url].add_done_callback(lambda _, i=i: queue_add(i, -1))
+                return i, url
+            return None
+
+        def outcome(i, url):
+            if url in self._known[i]:
+                return self._known[i][url]
+            try:
+                emails = futures[i][url].result() or []
+            except Exception as e:
+                telemetry.error(self.sources[i].name, e, url=url)
+                if on_error is not None:
+                    on_error(f"{self.sources[i].name.upper()} error for {url}: {e}")
+                emails = []
+            self._known[i][url] = emails
+            return emails
+
+        try:
+            # the first lookup of every row is queued up front; later sources get a row as soon as
+            # its earlier result (read in row order) came back empty
+            waiting = []
+            for key, current, links in rows:
+                if current:
+                    stats["skipped_already_have_email"] += 1
+                    results[key] = (current, "")
+                    continue
+                waiting.append((key, links, submit(0, links)))
+            while waiting:
+                still_waiting = []
+                for key, links, queued in waiting:
+                    if queued is None:
+                        results[key] = ("", "")
+                        continue
+                    i, url = queued
+                    emails = outcome(i, url)
+                    if emails:
+                        results[key] = (emails[0], self.sources[i].name)
+                        stats[f"found_{self.sources[i].name}"] += 1
+                    else:
+                        still_waiting.append((key, links, submit(i + 1, links)))
+                waiting = still_waiting
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        stats["dedup_ratio"] = dedup_ratio(stats["profile_lookups"], stats["unique_profiles"])
+        if self.cache is not None:
+            for key, value in self.cache.stats().items():
+                stats[key] = value - cache_start[key]
+        return [(key,) + results[key] for key, _, _ in rows], stats
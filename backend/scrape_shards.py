@@ -0,0 +1,115 @@
+# scrape_shards.py
+"""
+Multi-process sharded scraping (email_scraper_v2.py --shards K).
+
+Threads keep many requests in flight, but HTML parsing and email extraction
+run under one GIL. Here the leads are split across K worker processes, each
+with its own HTTP pool, scrape cache connection and (for FB) Chrome pool:
+
+ - every child reads the input file (CSV / Parquet / Feather, see lead_io)
+   and keeps the rows of its shard; a row's
+   shard is crc32 of its canonical IG link (else FB link, else its position)
+   mod K, so rows listing the same profile share a shard and the profile is
+   still fetched once per run
+ - children return only the email column of their rows, keyed by row index;
+   the parent writes them back into the input in original row order, so the
+   output does not depend on K or on which shard finished first
+ - stats are summed (merge_stats) and each child's telemetry aggregates are
+   merged into the parent registry (per-row events are not streamed)
+"""
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import lead_io
+import telemetry
+from profile_urls import canonicalize_ig_url, canonicalize_fb_url
+from scrape_core import detect_columns
+
+
+def shard_assignments(df, shards):
+    """Shard number (0..shards-1) of every row of df, as a list in row order."""
+    _, ig_col, fb_col = detect_columns(df)
+    igs = df[ig_col].tolist() if ig_col else [None] * len(df)
+    fbs = df[fb_col].tolist() if fb_col else [None] * len(df)
+    out = []
+    for pos, (ig, fb) in enumerate(zip(igs, fbs)):
+        key = canonicalize_ig_url(ig) or canonicalize_fb_url(fb) or str(pos)
+        out.append(zlib.crc32(key.encode("utf-8")) % shards)
+    return out
+
+
+def _run_shard(input_csv, shard, shards, options):
+    """Child process: scrape the rows of one shard. Returns (shard, row index, emails, stats, telemetry)."""
+    import email_scraper_v2 as es
+    import http_client
+    from scrape_cache import ScrapeCache
+
+    http_client.configure(pool_size=max(options["concurrency"], 10), max_retries=options["retries"])
+    cache = ScrapeCache(options["cache_path"], **options["cache_opts"]) if options["cache_path"] else None
+    fb_pool = None
+    if options["do_fb"]:
+        # the parent made sure the cookie file holds a valid session; shards cannot log in themselves
+        fb_pool = es.FbDriverPool(options["chromedriver_path"], size=options["fb_workers"],
+                                  cookies_path=options["fb_cookies_path"], interactive=False,
+                                  fast_profile=options["fb_fast"])
+    try:
+        df = lead_io.read_leads(input_csv, columns=options["columns"])
+        mine = df[[s == shard for s in shard_assignments(df, shards)]]
+        out, stats = es.run_on_dataframe(mine, do_fb=options["do_fb"], do_ig=options["do_ig"], fb_pool=fb_pool,
+                                         fb_http=options["fb_http"], fb_wait_seconds=options["fb_wait_seconds"],
+                                         concurrency=options["concurrency"], cache=cache, verbose=False)
+    finally:
+        if fb_pool is not None:
+            fb_pool.close()
+        if cache is not None:
+            cache.close()
+    email_col = detect_columns(df)[0] or "Found Email"
+    return shard, list(out.index), out[email_col].tolist(), stats, telemetry.get().export_state()
+
+
+def run_sharded(input_csv, shards, do_fb=False, do_ig=True, concurrency=1, retries=3, cache_path=None,
+                cache_opts=None, chromedriver_path=None, fb_workers=1, fb_profile_dir=None, fb_cookies_path=None,
+                fb_interactive=True, fb_http=False, fb_fast=True, fb_wait_seconds=5, columns=None):
+    """
+    Scrape input_csv in `shards` processes; columns: load only these input columns (None = all).
+    Returns (output DataFrame in input row order, combined stats).
+    """
+    import email_scraper_v2 as es
+
+    shards = max(1, int(shards))
+    if do_fb:
+        if not fb_cookies_path:
+            raise ValueError("--shards with FB scraping needs --fb-cookies so every shard can reuse one login")
+        # log in (or check the saved session) once here, so the shards start from valid cookies
+        driver = es.open_fb_driver(chromedriver_path, profile_dir=fb_profile_dir, cookies_path=fb_cookies_path,
+                                   interactive=fb_interactive, fast_profile=fb_fast)
+        es.save_fb_cookies(driver, fb_cookies_path)
+        driver.quit()
+
+    df = lead_io.read_leads(input_csv, columns=columns)
+    email_col = detect_columns(df)[0]
+    out_col = email_col or "Found Email"
+    out = df.copy()
+    out[out_col] = out[out_col].astype(object) if email_col else ""
+
+    options = dict(do_fb=do_fb, do_ig=do_ig, concurrency=concurrency, retries=retries, columns=columns,
+                   cache_path=os.path.abspath(cache_path) if cache_path else None, cache_opts=cache_opts or {},
+                   chromedriver_path=chromedriver_path, fb_workers=fb_workers, fb_cookies_path=fb_cookies_path,
+                   fb_http=fb_http, fb_fast=fb_fast, fb_wait_seconds=fb_wait_seconds)
+    total = {}
+    start = time.perf_counter()
+    # spawn, not fork: children start clean instead of inheriting the parent's sockets and locks
+    with ProcessPoolExecutor(max_workers=shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_run_shard, os.path.abspath(input_csv), i, shards, options) for i in range(shards)]
+        results = [f.result() for f in futures]
+    for shard, index, emails, stats, state in sorted(results, key=lambda r: r[0]):
+        out.loc[index, out_col] = emails
+        es.merge_stats(total, stats)
+        telemetry.get().merge_state(state)
+        print(f"[INFO] Shard {shard + 1}/{shards}: {stats['rows']} rows")
+    total["shards"] = shards
+    total["seconds"] = round(time.perf_counter() - start, 3)
+    return out, total
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+scrape_worker.py
+
+Usage:
+    python scrape_worker.py serve --concurrency 16 [chromedriver] [--fb-workers 2]
+    python scrape_worker.py submit leads.csv [--output out.csv|out.parquet] [--fb] [--no-ig]
+    python scrape_worker.py submit-sheet --rows 2:500 [--write-back] [--key-file key.json]
+    python scrape_worker.py status [JOB_ID]
+    python scrape_worker.py cancel JOB_ID
+
+Long-running scrape worker with a local SQLite job queue.
+
+A one-off `email_scraper_v2.py input.csv` run pays interpreter start-up,
+imports, HTTP pool warm-up and, for FB, Chrome launch and login every time.
+`serve` keeps one process alive that claims queued jobs in order and reuses,
+between jobs: the pooled HTTP session, the scrape cache, the sheet mirror,
+gspread clients and the FB driver pool (started on the first FB job).
+
+Jobs are lead CSV files (scraped in chunks, with progress after each chunk) or
+sheet ranges (read through the local sheet mirror; found emails are optionally
+written back). They can be submitted from here, from
+`email_scraper_v2.py --submit` and from the Streamlit app, all through
+JobQueue. Jobs left "running" by a worker that died are queued again on the
+next `serve` and resume from the rows already written.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_QUEUE_PATH = os.environ.get("SCRAPE_QUEUE_PATH", "scrape_jobs.sqlite")
+SPOOL_DIR = os.environ.get("SCRAPE_SPOOL_DIR", "scrape_spool")   # uploaded lead files and default outputs
+DEFAULT_KEY_FILE = "ai-outreach-automation-466008-f443c0dcd46c.json"
+DEFAULT_CHUNKSIZE = 500
+SHEETS_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Jobs table shared by submitters and workers (any number of processes).
+    status: queued -> running -> done / failed / cancelled; cancelling a running job sets
+    "cancelling" and the worker stops after the current chunk.
+    """
+    COLUMNS = ("id", "kind", "source", "output", "options", "status", "attempts", "rows_total", "rows_done",
+               "stats", "error", "worker_pid", "submitted_at", "started_at", "finished_at")
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # autocommit, so claim() can take the write lock explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scrape_jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " kind TEXT NOT NULL,"             # csv | sheet
+            " source TEXT NOT NULL,"           # CSV path, or JSON sheet range
+            " output TEXT,"
+            " options TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " rows_total INTEGER,"
+            " rows_done INTEGER NOT NULL DEFAULT 0,"
+            " stats TEXT,"
+            " error TEXT,"
+            " worker_pid INTEGER,"
+            " submitted_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scrape_jobs_status ON scrape_jobs (status, id)")
+
+    def _row(self, row):
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job["options"] = json.loads(job["options"])
+        job["stats"] = json.loads(job["stats"]) if job["stats"] else None
+        return job
+
+    def submit(self, kind, source, output=None, options=None):
+        """Queue a job; returns its id. kind "csv": source is a path; "sheet": a dict (see sheet_source)."""
+        if kind == "csv":
+            source = os.path.abspath(source)
+        elif not isinstance(source, str):
+            source = json.dumps(source)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO scrape_jobs (kind, source, output, options, status, submitted_at)"
+                " VALUES (?, ?, ?, ?, 'queued', ?)",
+                (kind, source, os.path.abspath(output) if output else None, json.dumps(options or {}), time.time()))
+            return cur.lastrowid
+
+    def claim(self):
+        """Mark the oldest queued job running for this process and return it (None if the queue is empty)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM scrape_jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE scrape_jobs SET status = 'running', attempts = attempts + 1, worker_pid = ?,"
+                        " started_at = ?, error = NULL WHERE id = ?", (os.getpid(), time.time(), row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._row(row)
+        if job is not None:
+            job["attempts"] += 1
+        return job
+
+    def progress(self, job_id, rows_done, stats, rows_total=None):
+        """Record progress; raises JobCancelled if the job was cancelled meanwhile."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE scrape_jobs SET rows_done = ?, stats = ?, rows_total = COALESCE(?, rows_total) WHERE id = ?",
+                (rows_done, json.dumps(stats), rows_total, job_id))
+            (status,) = self._conn.execute("SELECT status FROM scrape_jobs WHERE id = ?", (job_id,)).fetchone()
+        if status == "cancelling":
+            raise JobCancelled()
+
+    def _end(self, job_id, status, stats=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE scrape_jobs SET status = ?, stats = COALESCE(?, stats), error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(stats) if stats is not None else None, error, time.time(), job_id))
+
+    def finish(self, job_id, stats):
+        self._end(job_id, "done", stats=stats)
+
+    def fail(self, job_id, error):
+        self._end(job_id, "failed", error=error)
+
+    def cancelled(self, job_id):
+        self._end(job_id, "cancelled")
+
+    def cancel(self, job_id):
+        """Cancel a queued job now, or ask the worker to stop a running one. Returns the new status."""
+        with self._lock:
+            self._conn.execute("UPDATE scrape_jobs SET status = 'cancelled', finished_at = ?"
+                               " WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            self._conn.execute("UPDATE scrape_jobs SET status = 'cancelling' WHERE id = ? AND status = 'running'",
+                               (job_id,))
+            row = self._conn.execute("SELECT status FROM scrape_jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def requeue_stale(self):
+        """Queue again the jobs whose worker process is gone. Returns their ids."""
+        with self._lock:
+            running = self._conn.execute(
+                "SELECT id, worker_pid, status FROM scrape_jobs WHERE status IN ('running', 'cancelling')").fetchall()
+            stale = [(job_id, status) for job_id, pid, status in running if not _pid_alive(pid)]
+            for job_id, status in stale:
+                self._conn.execute("UPDATE scrape_jobs SET status = ? WHERE id = ?",
+                                   ("queued" if status == "running" else "cancelled", job_id))
+        return [job_id for job_id, status in stale if status == "running"]
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM scrape_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def list(self, limit=20):
+        """Most recent jobs first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM scrape_jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return pid != os.getpid()
+
+
+def sheet_source(spreadsheet="OutreachLog", worksheet="OutreachLeads", start_row=2, end_row=None,
+                 key_file=DEFAULT_KEY_FILE):
+    """Source of a "sheet" job: sheet rows start_row..end_row (inclusive, None = to the end)."""
+    return {"spreadsheet": spreadsheet, "worksheet": worksheet, "start_row": max(2, int(start_row)),
+            "end_row": int(end_row) if end_row else None, "key_file": os.path.abspath(key_file)}
+
+
+def default_output(job):
+    return os.path.abspath(os.path.join(SPOOL_DIR, f"job_{job['id']}_emails.csv"))
+
+
+class ScrapeWorker:
+    """Runs jobs from a JobQueue, keeping connections, caches and browser sessions warm between them."""
+
+    def __init__(self, queue, concurrency=8, retries=3, cache=None, mirror=None, chromedriver_path=None,
+                 fb_workers=1, fb_profile_dir=None, fb_cookies_path=None, fb_http=False, fb_fast=True,
+                 fb_wait_seconds=5, poll_seconds=1.0):
+        import http_client
+        self.queue = queue
+        self.concurrency = max(1, int(concurrency))
+        self.cache = cache
+        self.mirror = mirror
+        self.poll_seconds = poll_seconds
+        self.fb_http = fb_http
+        self.fb_wait_seconds = fb_wait_seconds
+        self._fb_args = dict(chromedriver_path=chromedriver_path, size=fb_workers, profile_dir=fb_profile_dir,
+                             cookies_path=fb_cookies_path, interactive=False, fast_profile=fb_fast)
+        self.fb_pool = None
+        self._sheets_clients = {}
+        http_client.configure(pool_size=max(self.concurrency, 10), max_retries=retries)
+
+    def get_fb_pool(self):
+        """The FB driver pool, started (and logged in) on the first FB job."""
+        if self.fb_pool is None:
+            if not self._fb_args["chromedriver_path"]:
+                raise RuntimeError("FB job submitted but the worker was started without a chromedriver path")
+            import email_scraper_v2 as es
+            self.fb_pool = es.FbDriverPool(**self._fb_args)
+        return self.fb_pool
+
+    def get_sheets_client(self, key_file):
+        client = self._sheets_clients.get(key_file)
+        if client is None:
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+            creds = ServiceAccountCredentials.from_json_keyfile_name(key_file, SHEETS_SCOPE)
+            client = self._sheets_clients[key_file] = gspread.authorize(creds)
+        return client
+
+    def _scrape_opts(self, options):
+        do_fb = bool(options.get("fb"))
+        return dict(do_fb=do_fb, do_ig=options.get("ig", True), fb_pool=self.get_fb_pool() if do_fb else None,
+                    fb_http=self.fb_http, fb_wait_seconds=self.fb_wait_seconds, concurrency=self.concurrency,
+                    cache=self.cache)
+
+    def run_csv_job(self, job):
+        import email_scraper_v2 as es
+        import lead_io
+        output = job["output"] or default_output(job)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        rows_total = lead_io.count_rows(job["source"])
+        # a job picked up again after a crash continues after the rows it already wrote (CSV output only)
+        resume = job["attempts"] > 1 and lead_io.appendable(output)
+        already = lead_io.count_rows(output) if resume else 0
+
+        def on_chunk(total):
+            self.queue.progress(job["id"], already + total["rows"], total, rows_total)
+
+        stats = es.run_streaming(job["source"], output, job["options"].get("chunksize") or DEFAULT_CHUNKSIZE,
+                                 resume=resume, on_chunk=on_chunk, columns=job["options"].get("columns"),
+                                 verbose=False, **self._scrape_opts(job["options"]))
+        stats["output"] = output
+        return stats
+
+    def run_sheet_job(self, job):
+        import pandas as pd
+        import email_scraper_v2 as es
+        from sheet_mirror import SheetMirror
+        from sheets_batch import SheetsBatchWriter
+        spec = json.loads(job["source"])
+        ws = self.get_sheets_client(spec["key_file"]).open(spec["spreadsheet"]).worksheet(spec["worksheet"])
+        if self.mirror is None:
+            self.mirror = SheetMirror()
+        values, sync = self.mirror.read(ws)
+        headers = values[0] if values else []
+        start = spec["start_row"]
+        end = min(spec["end_row"] or len(values), len(values))
+        # index = sheet row - 2, like everywhere else that writes back to the sheet
+        df = pd.DataFrame(values[start - 1:end], columns=headers, index=range(start - 2, end - 1))
+        self.queue.progress(job["id"], 0, {}, len(df))
+        out, stats = es.run_on_dataframe(df, verbose=False, **self._scrape_opts(job["options"]))
+        self.queue.progress(job["id"], len(df), stats)
+
+        email_col = es.detect_columns(df)[0]
+        if job["options"].get("write_back") and email_col:
+            col = headers.index(email_col) + 1
+            cells = [(idx0 + 2, col, found) for idx0, found in out[email_col].items()
+                     if found and found != df.at[idx0, email_col]]
+            writer = SheetsBatchWriter()
+            try:
+                for cell in cells:
+                    writer.update_cell(ws, *cell)
+                writer.flush()
+            except Exception:
+                self.mirror.invalidate(sync["sheet"])
+                raise
+            self.mirror.set_cells(sync["sheet"], cells)
+            stats["written_back"] = len(cells)
+        if job["output"]:
+            import lead_io
+            lead_io.write_leads(out, job["output"])
+            stats["output"] = job["output"]
+        return stats
+
+    def run_job(self, job):
+        print(f"[WORKER] Job {job['id']} ({job['kind']}) started: {job['source']}")
+        start = time.perf_counter()
+        try:
+            stats = self.run_csv_job(job) if job["kind"] == "csv" else self.run_sheet_job(job)
+        except JobCancelled:
+            self.queue.cancelled(job["id"])
+            print(f"[WORKER] Job {job['id']} cancelled")
+            return
+        except Exception as e:
+            self.queue.fail(job["id"], f"{type(e).__name__}: {e}")
+            print(f"[WORKER] Job {job['id']} failed: {e}")
+            return
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        self.queue.finish(job["id"], stats)
+        print(f"[WORKER] Job {job['id']} done in {stats['seconds']}s: {stats}")
+
+    def serve(self, once=False):
+        """Claim and run jobs until interrupted (once=True: until the queue is empty)."""
+        requeued = self.queue.requeue_stale()
+        if requeued:
+            print(f"[WORKER] Re-queued jobs left running by a stopped worker: {requeued}")
+        print(f"[WORKER] Waiting for jobs in {self.queue.path}")
+        try:
+            while True:
+                job = self.queue.claim()
+                if job is None:
+                    if once:
+                        return
+                    time.sleep(self.poll_seconds)
+                    continue
+                self.run_job(job)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.fb_pool is not None:
+            self.fb_pool.close()
+            self.fb_pool = None
+
+
+def format_job(job):
+    total = job["rows_total"]
+    progress = f"{job['rows_done']}/{total}" if total is not None else str(job["rows_done"])
+    line = f"#{job['id']:<5} {job['status']:<10} {job['kind']:<5} rows {progress:<13} {job['source']}"
+    if job["error"]:
+        line += f"\n       error: {job['error']}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape worker daemon and job queue.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite file of the job queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Run the worker.")
+    serve.add_argument("chromedriver", nargs="?", default=None, help="chromedriver path; enables FB jobs.")
+    serve.add_argument("--concurrency", type=int, default=8, help="Concurrent IG requests per job.")
+    serve.add_argument("--retries", type=int, default=3, help="Retries per request on timeouts, 429 and 5xx.")
+    serve.add_argument("--fb-workers", type=int, default=1, help="Chrome drivers kept open for FB jobs.")
+    serve.add_argument("--fb-profile-dir", default=None, help="Chrome user-data-dir holding the FB login.")
+    serve.add_argument("--fb-cookies", default=None, help="Saved FB session cookies (see email_scraper_v2).")
+    serve.add_argument("--fb-http", action="store_true", help="Fetch FB About pages over HTTP first.")
+    serve.add_argument("--fb-wait", type=int, default=5, help="Max seconds to wait for FB contact info.")
+    serve.add_argument("--no-cache", action="store_true", help="Disable the persistent scrape cache.")
+    serve.add_argument("--poll", type=float, default=1.0, help="Seconds between queue checks when idle.")
+    serve.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+
+    submit = sub.add_parser("submit", help="Queue a lead file (CSV, Parquet or Feather).")
+    submit.add_argument("input_csv")
+    submit.add_argument("--output", default=None,
+                        help=f"Result file, CSV / .parquet / .feather (default {SPOOL_DIR}/job_<id>_emails.csv).")
+    submit.add_argument("--fb", action="store_true", help="Also scrape FB (the worker needs a chromedriver).")
+    submit.add_argument("--no-ig", action="store_true", help="Skip Instagram.")
+    submit.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per progress update.")
+
+    submit_sheet = sub.add_parser("submit-sheet", help="Queue a range of the leads worksheet.")
+    submit_sheet.add_argument("--spreadsheet", default="OutreachLog")
+    submit_sheet.add_argument("--worksheet", default="OutreachLeads")
+    submit_sheet.add_argument("--rows", default="2:", help="Sheet rows FIRST:LAST (inclusive; LAST optional).")
+    submit_sheet.add_argument("--key-file", default=DEFAULT_KEY_FILE, help="Service-account JSON readable by the worker.")
+    submit_sheet.add_argument("--write-back", action="store_true", help="Write found emails into the Email column.")
+    submit_sheet.add_argument("--output", default=None, help="Also save the scraped range (CSV / .parquet / .feather).")
+    submit_sheet.add_argument("--fb", action="store_true")
+    submit_sheet.add_argument("--no-ig", action="store_true")
+
+    status = sub.add_parser("status", help="Show recent jobs, or one job in detail.")
+    status.add_argument("job_id", nargs="?", type=int)
+    status.add_argument("--limit", type=int, default=20)
+
+    cancel = sub.add_parser("cancel", help="Cancel a queued or running job.")
+    cancel.add_argument("job_id", type=int)
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+    if args.command == "serve":
+        cache = None
+        if not args.no_cache:
+            from scrape_cache import ScrapeCache
+            cache = ScrapeCache()
+        worker = ScrapeWorker(queue, concurrency=args.concurrency, retries=args.retries, cache=cache,
+                              chromedriver_path=args.chromedriver, fb_workers=args.fb_workers,
+                              fb_profile_dir=args.fb_profile_dir, fb_cookies_path=args.fb_cookies,
+                              fb_http=args.fb_http, fb_wait_seconds=args.fb_wait, poll_seconds=args.poll)
+        try:
+            worker.serve(once=args.once)
+        except KeyboardInterrupt:
+            print("[WORKER] Stopped")
+    elif args.command == "submit":
+        if not os.path.exists(args.input_csv):
+            print(f"[ERROR] input file not found: {args.input_csv}")
+            sys.exit(2)
+        job_id = queue.submit("csv", args.input_csv, args.output,
+                              {"fb": args.fb, "ig": not args.no_ig, "chunksize": args.chunksize})
+        print(f"[INFO] Queued job {job_id}")
+    elif args.command == "submit-sheet":
+        first, _, last = args.rows.partition(":")
+        source = sheet_source(args.spreadsheet, args.worksheet, first or 2, last or None, args.key_file)
+        job_id = queue.submit("sheet", source, args.output,
+                              {"fb": args.fb, "ig": not args.no_ig, "write_back": args.write_back})
+        print(f"[INFO] Queued job {job_id}")
+    elif args.command == "status":
+        if args.job_id is None:
+            for job in queue.list(args.limit):
+                print(format_job(job))
+        else:
+            job = queue.get(args.job_id)
+            if job is None:
+                print(f"[ERROR] no job {args.job_id}")
+                sys.exit(1)
+            print(json.dumps(job, indent=2))
+    elif args.command == "cancel":
+        print(f"[INFO] Job {args.job_id}: {queue.cancel(args.job_id)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# sheet_mirror.py
+"""
+Local SQLite mirror of a leads worksheet, synced incrementally.
+
+get_all_values() on the whole OutreachLeads sheet costs time and read quota in
+proportion to the sheet. The mirror keeps every row locally and on sync() only
+downloads what changed:
+
+ - incremental mode, when the sheet has a modified-time column (see
+   MODIFIED_COLUMNS; an Apps Script onEdit trigger can keep it current): read
+   the header row plus the first and modified-time columns in one call, then
+   fetch just the rows whose stamp or first cell differs from the mirror
+   (contiguous rows as one range, up to BATCH_GET_RANGES ranges per call).
+ - full mode on the first sync and when the headers changed: one
+   get_all_values(); rows are compared by hash so callers still learn which
+   rows changed.
+ - direct mode when the sheet has no modified-time column: the mirror would
+   save nothing, so rows are not stored and every read is one get_all_values(),
+   as without a mirror. The headers are rechecked on each read, so adding the
+   column switches the sheet over.
+
+read() logs which mode each sync used.
+
+Our own writes (Status / Timestamp cells) go through set_cells() so the mirror
+does not have to re-read them; API writes do not fire onEdit, so they would not
+show up as changed. After a failed write, invalidate() forces a full resync.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import telemetry
+
+DEFAULT_MIRROR_PATH = os.environ.get("SHEET_MIRROR_PATH", "sheet_mirror.sqlite")
+MODIFIED_COLUMNS = ["Last Modified", "Modified", "Updated At", "updated_at", "last_modified"]
+BATCH_GET_RANGES = 200        # ranges per values:batchGet call (keeps the URL short)
+
+
+def sheet_key(ws):
+    """Mirror key of a gspread worksheet: spreadsheet id + worksheet title."""
+    return f"{ws.spreadsheet_id}/{ws.title}"
+
+
+def column_letter(n):
+    """1 -> A, 27 -> AA."""
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def row_hash(cells):
+    return hashlib.sha1(json.dumps(cells, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _pad(cells, width):
+    cells = [str(c) for c in cells[:width]]
+    return cells + [""] * (width - len(cells))
+
+
+class SheetMirror:
+    def __init__(self, path=DEFAULT_MIRROR_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # shared by Streamlit job threads, serialised through self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mirror_sheets ("
+            " sheet TEXT PRIMARY KEY,"
+            " headers TEXT NOT NULL,"
+            " modified_col TEXT,"
+            " synced_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mirror_rows ("
+            " sheet TEXT NOT NULL,"
+            " row INTEGER NOT NULL,"      # sheet row number (data starts at 2)
+            " cells TEXT NOT NULL,"
+            " row_hash TEXT NOT NULL,"
+            " first_cell TEXT NOT NULL,"
+            " modified TEXT NOT NULL,"
+            " PRIMARY KEY (sheet, row))"
+        )
+        self._conn.commit()
+
+    # -- sync --
+
+    def read(self, ws, modified_columns=MODIFIED_COLUMNS):
+        """Sync ws and return (values like get_all_values(), sync stats)."""
+        stats, values = self._sync(ws, modified_columns)
+        if values is None:
+            values = self.values(stats["sheet"])
+        print(f"[MIRROR] {stats['sheet']}: {stats['mode']} sync, {stats['fetched_rows']} of {stats['rows']} rows "
+              f"read, {stats['changed']} changed")
+        return values, stats
+
+    def sync(self, ws, modified_columns=MODIFIED_COLUMNS):
+        """
+        Bring the mirror of ws up to date. Returns stats: sheet, mode ("incremental" / "full" / "direct"),
+        rows, changed, removed, fetched_rows and changed_rows (sheet row numbers).
+        """
+        return self._sync(ws, modified_columns)[0]
+
+    def _sync(self, ws, modified_columns):
+        """(stats, values); values is the sheet as read in direct mode, None when it is in the mirror."""
+        key = sheet_key(ws)
+        with self._lock:
+            stored = self._conn.execute(
+                "SELECT headers, modified_col FROM mirror_sheets WHERE sheet = ?", (key,)).fetchone()
+        if stored is not None and stored[1] is None:
+            # no modified column last time: read it whole, as the header check would be an extra call
+            with telemetry.timer("sheets_read"):
+                values = ws.get_all_values()
+            modified_col = next((c for c in modified_columns if c in (values[0] if values else [])), None)
+            if modified_col is None:
+                stats = self._direct(key, values)
+            else:
+                stats, values = self._full_sync(ws, key, modified_col, values), None
+        else:
+            with telemetry.timer("sheets_read"):
+                headers = ws.row_values(1)
+            modified_col = next((c for c in modified_columns if c in headers), None)
+            values = None
+            if modified_col is None:
+                with telemetry.timer("sheets_read"):
+                    values = ws.get_all_values()
+                stats = self._direct(key, values)
+            elif stored is None or json.loads(stored[0]) != headers or stored[1] != modified_col:
+                stats = self._full_sync(ws, key, modified_col)
+            else:
+                stats = self._incremental_sync(ws, key, headers, modified_col)
+        telemetry.incr("mirror_rows_fetched", stats["fetched_rows"])
+        return stats, values
+
+    def _direct(self, key, values):
+        """Record that key has no modified column and drop its stored rows (set_cells then skips it)."""
+        headers = values[0] if values else []
+        rows = max(0, len(values) - 1)
+        with self._lock:
+            self._conn.execute("DELETE FROM mirror_rows WHERE sheet = ?", (key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mirror_sheets (sheet, headers, modified_col, synced_at) VALUES (?, ?, NULL, ?)",
+                (key, json.dumps(headers), time.time()))
+            self._conn.commit()
+        return {"sheet": key, "mode": "direct", "rows": rows, "changed": rows, "removed": 0,
+                "fetched_rows": rows, "changed_rows": list(range(2, rows + 2))}
+
+    def _full_sync(self, ws, key, modified_col, values=None):
+        if values is None:
+            with telemetry.timer("sheets_read"):
+                values = ws.get_all_values()
+        headers = values[0] if values else []
+        mod_idx = headers.index(modified_col)
+        with self._lock:
+            known = dict(self._conn.execute("SELECT row, row_hash FROM mirror_rows WHERE sheet = ?", (key,)))
+            changed = []
+            for i, cells in enumerate(values[1:]):
+                cells = _pad(cells, len(headers))
+                h = row_hash(cells)
+                if known.get(i + 2) != h:
+                    changed.append((i + 2, cells, h, mod_idx))
+            removed = self._store(key, headers, modified_col, changed, len(values) - 1)
+        return {"sheet": key, "mode": "full", "rows": max(0, len(values) - 1), "changed": len(changed),
+                "removed": removed, "fetched_rows": max(0, len(values) - 1), "changed_rows": [c[0] for c in changed]}
+
+    def _incremental_sync(self, ws, key, headers, modified_col):
+        mod_idx = headers.index(modified_col)
+        first, stamp = column_letter(1), column_letter(mod_idx + 1)
+        with telemetry.timer("sheets_read"):
+            first_cells, stamps = [(r[0] if r else []) for r in
+                                   ws.batch_get([f"{first}2:{first}", f"{stamp}2:{stamp}"], major_dimension="COLUMNS")]
+        count = max(len(first_cells), len(stamps))
+        first_cells = _pad(first_cells, count)
+        stamps = _pad(stamps, count)
+        with self._lock:
+            known = {row: (f, m) for row, f, m in self._conn.execute(
+                "SELECT row, first_cell, modified FROM mirror_rows WHERE sheet = ?", (key,))}
+        stale = [i + 2 for i in range(count) if known.get(i + 2) != (first_cells[i], stamps[i])]
+
+        # contiguous stale rows become one A<start>:<last><end> range
+        ranges = []
+        for row in stale:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        last = column_letter(len(headers))
+        changed = []
+        for i in range(0, len(ranges), BATCH_GET_RANGES):
+            chunk = ranges[i:i + BATCH_GET_RANGES]
+            with telemetry.timer("sheets_read"):
+                fetched = ws.batch_get([f"A{start}:{last}{end}" for start, end in chunk])
+            for (start, end), block in zip(chunk, fetched):
+                block = list(block)
+                for row in range(start, end + 1):
+                    cells = _pad(block[row - start] if row - start < len(block) else [], len(headers))
+                    changed.append((row, cells, row_hash(cells), mod_idx))
+        with self._lock:
+            removed = self._store(key, headers, modified_col, changed, count)
+        return {"sheet": key, "mode": "incremental", "rows": count, "changed": len(changed), "removed": removed,
+                "fetched_rows": len(changed), "changed_rows": stale}
+
+    def _store(self, key, headers, modified_col, changed, count):
+        """Upsert changed rows, drop rows past the end, record the headers (caller holds the lock)."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO mirror_rows (sheet, row, cells, row_hash, first_cell, modified)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, row, json.dumps(cells, ensure_ascii=False), h, cells[0] if cells else "",
+              cells[mod_idx]) for row, cells, h, mod_idx in changed])
+        removed = self._conn.execute(
+            "DELETE FROM mirror_rows WHERE sheet = ? AND row > ?", (key, count + 1)).rowcount
+        self._conn.execute(
+            "INSERT OR REPLACE INTO mirror_sheets (sheet, headers, modified_col, synced_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(headers), modified_col, time.time()))
+        self._conn.commit()
+        return removed
+
+    # -- local reads / writes --
+
+    def values(self, key):
+        """Mirrored sheet like get_all_values(): header row first, then every data row (padded)."""
+        with self._lock:
+            stored = self._conn.execute("SELECT headers FROM mirror_sheets WHERE sheet = ?", (key,)).fetchone()
+            if stored is None:
+                return []
+            rows = self._conn.execute("SELECT cells FROM mirror_rows WHERE sheet = ? ORDER BY row", (key,))
+            return [json.loads(stored[0])] + [json.loads(cells) for (cells,) in rows]
+
+    def set_cells(self, key, cells):
+        """Apply cells we wrote to the sheet: (row, col, value), 1-based like update_cell."""
+        with self._lock:
+            for row, col, value in cells:
+                found = self._conn.execute(
+                    "SELECT cells FROM mirror_rows WHERE sheet = ? AND row = ?", (key, row)).fetchone()
+                if found is None:
+                    continue
+                values = json.loads(found[0])
+                if col - 1 >= len(values):
+                    continue
+                values[col - 1] = str(value)
+                self._conn.execute(
+                    "UPDATE mirror_rows SET cells = ?, row_hash = ? WHERE sheet = ? AND row = ?",
+                    (json.dumps(values, ensure_ascii=False), row_hash(values), key, row))
+            self._conn.commit()
+
+    def invalidate(self, key):
+        """Forget the sync state of key; the next sync() reads the whole sheet."""
+        with self._lock:
+            self._conn.execute("DELETE FROM mirror_sheets WHERE sheet = ?", (key,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,101 @@
+# sheets_batch.py
+"""
+Batched Google Sheets writes.
+
+Instead of one API call per append_row / update_cell, rows and cells are queued
+and flushed with worksheet.append_rows / worksheet.batch_update, batch_size
+rows or cells per call. Calls that hit the Sheets per-minute quota (HTTP 429)
+or a transient 5xx are retried with exponential backoff.
+"""
+import random
+import time
+
+import telemetry
+
+DEFAULT_BATCH_SIZE = 500
+RETRY_STATUS_CODES = (429, 500, 502, 503)
+
+
+def rowcol_to_a1(row, col):
+    """(1, 1) -> 'A1', (2, 28) -> 'AB2'."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+
+def call_with_quota_retry(fn, *args, max_retries=6, backoff_base=2.0, backoff_max=64.0, **kwargs):
+    """Call a gspread method, retrying on quota (429) and transient 5xx errors."""
+    attempt = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            telemetry.error("sheets", e if status is None else f"HTTP {status}")
+            if status not in RETRY_STATUS_CODES or attempt >= max_retries:
+                raise
+            delay = min(backoff_max, backoff_base * (2 ** attempt)) + random.uniform(0, 1)
+            print(f"[SHEETS] HTTP {status}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+class SheetsBatchWriter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_retries=6):
+        self.batch_size = max(1, int(batch_size))
+        self.max_retries = max_retries
+        self.api_calls = 0
+        # keyed by id(worksheet) so any gspread Worksheet-like object works
+        self._worksheets = {}
+        self._rows = {}
+        self._cells = {}
+
+    def _track(self, worksheet):
+        key = id(worksheet)
+        self._worksheets[key] = worksheet
+        return key
+
+    def _call(self, fn, *args, **kwargs):
+        self.api_calls += 1
+        with telemetry.timer("sheets_write"):
+            return call_with_quota_retry(fn, *args, max_retries=self.max_retries, **kwargs)
+
+    def append_row(self, worksheet, row):
+        key = self._track(worksheet)
+        self._rows.setdefault(key, []).append(list(row))
+        if len(self._rows[key]) >= self.batch_size:
+            self._flush_rows(key)
+
+    def update_cell(self, worksheet, row, col, value):
+        key = self._track(worksheet)
+        self._cells.setdefault(key, []).append({"range": rowcol_to_a1(row, col), "values": [[value]]})
+        if len(self._cells[key]) >= self.batch_size:
+            self._flush_cells(key)
+
+    def _flush_rows(self, key):
+        rows = self._rows.pop(key, [])
+        for i in range(0, len(rows), self.batch_size):
+            self._call(self._worksheets[key].append_rows, rows[i:i + self.batch_size], value_input_option="RAW")
+
+    def _flush_cells(self, key):
+        cells = self._cells.pop(key, [])
+        for i in range(0, len(cells), self.batch_size):
+            # update_cell parses input like the UI does; keep that so Timestamp stays a date/time value
+            self._call(self._worksheets[key].batch_update, cells[i:i + self.batch_size],
+                       value_input_option="USER_ENTERED")
+
+    def flush(self):
+        """Send everything still queued. Rows are flushed before cells, per worksheet."""
+        for key in list(self._rows):
+            self._flush_rows(key)
+        for key in list(self._cells):
+            self._flush_cells(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,262 @@
+# telemetry.py
+"""
+Structured run metrics for the scraper and PEC generator.
+
+One process-wide Telemetry registry collects:
+ - per-stage latency histograms (http_fetch, html_parse, regex_extract,
+   selenium_load, sheets_read, sheets_write, ...)
+ - error counts by stage and exception type
+ - gauges such as queue depths (last and max value)
+ - plain counters
+
+Per-row outcomes are emitted as events instead of print lines. With
+open_sink("metrics.jsonl") they are streamed as JSON lines and a summary line is
+appended by close(); with a .prom path only a Prometheus text file is written at
+close(). Without a sink only the aggregates are kept.
+"""
+import copy
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# histogram bucket upper bounds in seconds (Prometheus style, +Inf implied)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "outreach"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, capped at the largest value seen."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else None,
+            "p50_ms": _ms(self.quantile(0.50)),
+            "p99_ms": _ms(self.quantile(0.99)),
+            "max_ms": _ms(self.max) if self.count else None,
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class Telemetry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.errors = {}      # (stage, exception type) -> count
+        self.gauges = {}      # name -> {"last": v, "max": v}
+        self.counters = {}
+        self._sink = None
+        self._sink_path = None
+        self._format = None
+
+    # -- recording --
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def error(self, stage, exc, **fields):
+        """Count an error by stage and type; exc may be an exception or a type name."""
+        kind = exc if isinstance(exc, str) else type(exc).__name__
+        with self._lock:
+            self.errors[(stage, kind)] = self.errors.get((stage, kind), 0) + 1
+        self.event("error", stage=stage, error=kind, message=None if isinstance(exc, str) else str(exc), **fields)
+
+    def gauge(self, name, value):
+        with self._lock:
+            g = self.gauges.get(name)
+            if g is None:
+                self.gauges[name] = {"last": value, "max": value}
+            else:
+                g["last"] = value
+                g["max"] = max(g["max"], value)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def event(self, kind, **fields):
+        """Write one structured event to the JSON-lines sink (dropped when there is none)."""
+        if self._sink is None:
+            return
+        line = json.dumps(dict({"ts": round(time.time(), 3), "event": kind}, **fields), default=str)
+        with self._lock:
+            if self._sink is not None:
+                self._sink.write(line + "\n")
+
+    # -- export --
+
+    def export_state(self):
+        """Picklable copy of the aggregates, so a child process can hand them to the parent (merge_state)."""
+        with self._lock:
+            return {"stages": copy.deepcopy(self.stages), "errors": dict(self.errors),
+                    "gauges": copy.deepcopy(self.gauges), "counters": dict(self.counters)}
+
+    def merge_state(self, state):
+        """Add another registry's export_state() into this one (gauges keep the highest max)."""
+        with self._lock:
+            for name, hist in state["stages"].items():
+                self.stages.setdefault(name, Histogram()).merge(hist)
+            for key, n in state["errors"].items():
+                self.errors[key] = self.errors.get(key, 0) + n
+            for name, g in state["gauges"].items():
+                mine = self.gauges.setdefault(name, dict(g))
+                mine["last"] = g["last"]
+                mine["max"] = max(mine["max"], g["max"])
+            for name, n in state["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {name: h.summary() for name, h in sorted(self.stages.items())},
+                "errors": [{"stage": s, "error": e, "count": n} for (s, e), n in sorted(self.errors.items())],
+                "gauges": {name: dict(g) for name, g in sorted(self.gauges.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def prometheus_text(self):
+        p = METRIC_PREFIX
+        lines = [f"# HELP {p}_stage_seconds Latency of one pipeline stage.", f"# TYPE {p}_stage_seconds histogram"]
+        with self._lock:
+            for stage, h in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, n in zip(list(BUCKETS) + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            lines += [f"# HELP {p}_errors_total Errors by stage and exception type.", f"# TYPE {p}_errors_total counter"]
+            for (stage, kind), n in sorted(self.errors.items()):
+                lines.append(f'{p}_errors_total{{stage="{stage}",type="{kind}"}} {n}')
+            lines += [f"# HELP {p}_gauge Last value of a gauge (queue depths, pool sizes).", f"# TYPE {p}_gauge gauge"]
+            for name, g in sorted(self.gauges.items()):
+                lines.append(f'{p}_gauge{{name="{name}"}} {g["last"]}')
+            lines += [f"# HELP {p}_gauge_max Highest value a gauge reached.", f"# TYPE {p}_gauge_max gauge"]
+            for name, g in sorted(self.gauges.items()):
+                lines.append(f'{p}_gauge_max{{name="{name}"}} {g["max"]}')
+            lines += [f"# HELP {p}_total Run counters.", f"# TYPE {p}_total counter"]
+            for name, n in sorted(self.counters.items()):
+                lines.append(f'{p}_total{{name="{name}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """Short human-readable per-stage table for the end of a CLI run."""
+        snap = self.snapshot()
+        out = []
+        for stage, s in snap["stages"].items():
+            out.append(f"[METRICS] {stage:<14} n={s['count']:<7} mean={s['mean_ms']}ms p50<={s['p50_ms']}ms "
+                       f"p99<={s['p99_ms']}ms max={s['max_ms']}ms")
+        for e in snap["errors"]:
+            out.append(f"[METRICS] errors {e['stage']}/{e['error']}: {e['count']}")
+        for name, g in snap["gauges"].items():
+            out.append(f"[METRICS] {name}: max {g['max']}")
+        return out
+
+    def open_sink(self, path, fmt=None):
+        """
+        Export to path on close(). fmt is "jsonl" or "prom"; by default .prom/.txt
+        paths get the Prometheus text format and anything else JSON lines (events stream as they happen).
+        """
+        self._format = fmt or ("prom" if path.endswith((".prom", ".txt")) else "jsonl")
+        self._sink_path = path
+        if self._format == "jsonl":
+            self._sink = open(path, "w", encoding="utf-8")
+
+    def close(self, **extra):
+        """Finish the export: summary line for JSON lines (extra fields, e.g. stats, included), file for prom."""
+        if self._format == "jsonl" and self._sink is not None:
+            self.event("summary", **self.snapshot(), **extra)
+            with self._lock:
+                self._sink.close()
+                self._sink = None
+        elif self._format == "prom":
+            with open(self._sink_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+        self._format = None
+
+
+_default = Telemetry()
+
+
+def get():
+    """The process-wide registry."""
+    return _default
+
+
+def reset():
+    global _default
+    _default = Telemetry()
+    return _default
+
+
+def observe(stage, seconds):
+    _default.observe(stage, seconds)
+
+
+def timer(stage):
+    return _default.timer(stage)
+
+
+def error(stage, exc, **fields):
+    _default.error(stage, exc, **fields)
+
+
+def gauge(name, value):
+    _default.gauge(name, value)
+
+
+def incr(name, n=1):
+    _default.incr(name, n)
+
+
+def event(kind, **fields):
+    _default.event(kind, **fields)
@@ -0,0 +1,143 @@
+import json
+import os
+import stat
+
+import pytest
+
+import email_scraper_v2 as es
+
+COOKIES = [{"name": "c_user", "value": "42", "domain": ".facebook.com"}]
+
+
+class FakeDriver:
+    def get_cookies(self):
+        return COOKIES
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_cookie_file_is_created_owner_only(tmp_path):
+    path = tmp_path / "fb_session.json"
+    old_umask = os.umask(0)
+    try:
+        es.save_fb_cookies(FakeDriver(), str(path))
+    finally:
+        os.umask(old_umask)
+    assert mode(path) == 0o600
+    assert json.loads(path.read_text()) == COOKIES
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_existing_cookie_file_is_tightened(tmp_path):
+    path = tmp_path / "fb_session.json"
+    path.write_text("[]" * 100)
+    os.chmod(path, 0o644)
+    es.save_fb_cookies(FakeDriver(), str(path))
+    assert mode(path) == 0o600
+    assert json.loads(path.read_text()) == COOKIES
+
+
+class FakeChrome:
+    """Selenium driver stand-in; crash() makes every call fail like a dead chromedriver."""
+    started = []
+
+    def __init__(self, *args, **kwargs):
+        self.dead = self.quit_called = False
+        self.page_source = "<html><p>contact: booking@venue.com</p></html>"
+        FakeChrome.started.append(self)
+
+    def _check(self):
+        if self.dead:
+            raise RuntimeError("chrome not reachable")
+
+    @property
+    def current_url(self):
+        self._check()
+        return "https://www.facebook.com/"
+
+    def get(self, url):
+        self._check()
+
+    def add_cookie(self, cookie):
+        pass
+
+    def get_cookies(self):
+        return COOKIES
+
+    def execute_script(self, script):
+        return "FakeChrome/1.0"
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def chrome(monkeypatch):
+    FakeChrome.started = []
+    monkeypatch.setattr(es, "open_fb_driver", lambda *args, **kwargs: FakeChrome())
+    monkeypatch.setattr(es, "init_selenium", lambda *args, **kwargs: FakeChrome())
+    return FakeChrome
+
+
+def new_pool(size):
+    return es.FbDriverPool("chromedriver", size=size, fast_profile=False)
+
+
+def test_crashed_driver_is_replaced_not_returned(chrome):
+    pool = new_pool(1)
+    crashed = chrome.started[0]
+    crashed.dead = True
+
+    assert pool.scrape("https://www.facebook.com/venue", wait_seconds=0) == ["booking@venue.com"]
+
+    assert crashed.quit_called
+    assert pool.restarts == 1
+    assert pool._idle.get_nowait() is chrome.started[1]
+
+
+def test_replacement_crashing_on_the_retry_is_not_returned(chrome, monkeypatch):
+    pool = new_pool(1)
+    chrome.started[0].dead = True
+
+    def crashes_on_page_load(*args, **kwargs):
+        driver = FakeChrome()
+        if len(chrome.started) == 2:
+            def get(url):
+                driver.dead = url != "https://www.facebook.com/"
+                driver._check()
+            driver.get = get
+        return driver
+
+    monkeypatch.setattr(es, "init_selenium", crashes_on_page_load)
+    assert pool.scrape("https://www.facebook.com/venue", wait_seconds=0) == []
+
+    assert chrome.started[1].dead and chrome.started[1].quit_called
+    assert pool._idle.get_nowait() is chrome.started[2]
+
+
+def test_failed_replacement_is_retried_on_next_checkout(chrome, monkeypatch):
+    pool = new_pool(1)
+    chrome.started[0].dead = True
+    monkeypatch.setattr(es, "init_selenium", lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("no chrome")))
+    with pytest.raises(RuntimeError):
+        pool.scrape("https://www.facebook.com/venue", wait_seconds=0)
+
+    monkeypatch.setattr(es, "init_selenium", lambda *args, **kwargs: FakeChrome())
+    assert pool.scrape("https://www.facebook.com/venue", wait_seconds=0) == ["booking@venue.com"]
+    assert not chrome.started[-1].dead
+
+
+def test_failed_constructor_quits_started_drivers(chrome, monkeypatch):
+    def third_fails(*args, **kwargs):
+        if len(chrome.started) == 2:
+            raise RuntimeError("no chrome")
+        return FakeChrome()
+
+    monkeypatch.setattr(es, "init_selenium", third_fails)
+    with pytest.raises(RuntimeError):
+        new_pool(3)
+    assert len(chrome.started) == 2
+    assert all(d.quit_called for d in chrome.started)
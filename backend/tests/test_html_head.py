@@ -0,0 +1,70 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import telemetry
+from html_head import CHUNK_SIZE, DRAIN_MAX_BYTES, fetch_og_description
+from http_client import HttpClient
+
+
+def _page(size):
+    head = '<html><head><meta property="og:description" content="Bookings: dj@example.com"></head><body>'
+    return (head + "x" * (size - len(head)) + "</body></html>").encode("utf-8")
+
+
+@pytest.fixture
+def server():
+    """Keep-alive server; .connections counts the TCP connections it accepted."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with lock:
+                srv.connections += 1
+
+        def do_GET(self):
+            body = srv.pages[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    lock = threading.Lock()
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    srv.connections = 0
+    srv.pages = {"/small": _page(DRAIN_MAX_BYTES), "/large": _page(300 * 1024)}
+    srv.base_url = "http://127.0.0.1:%d" % srv.server_address[1]
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_small_remainder_is_drained_and_connection_reused(server):
+    client = HttpClient(pool_size=1, max_retries=0)
+    for _ in range(20):
+        assert fetch_og_description(client, server.base_url + "/small") == "Bookings: dj@example.com"
+    client.close()
+    assert server.connections == 1
+
+
+def test_large_page_is_not_read_past_its_head(server):
+    counters = telemetry.reset().counters
+    client = HttpClient(pool_size=1, max_retries=0)
+    for _ in range(3):
+        assert fetch_og_description(client, server.base_url + "/large") == "Bookings: dj@example.com"
+    client.close()
+    assert server.connections == 3
+    page = len(server.pages["/large"])
+    assert counters["body_bytes_read"] <= 3 * 2 * CHUNK_SIZE
+    assert counters["body_bytes_read"] + counters["body_bytes_skipped"] == 3 * page
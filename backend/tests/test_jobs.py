@@ -0,0 +1,74 @@
+import threading
+
+from jobs import Job
+
+
+def gated_job(items, batch_size=1):
+    """Job whose batches wait for .gate; .entered is set when a batch starts."""
+    gate, entered = threading.Event(), threading.Event()
+
+    def fn(batch, log):
+        entered.set()
+        assert gate.wait(5)
+        return [item * 2 for item in batch]
+
+    job = Job("test", items, fn, batch_size=batch_size)
+    job.gate, job.entered = gate, entered
+    return job
+
+
+def test_runs_all_batches():
+    job = Job("test", range(5), lambda batch, log: [i * 2 for i in batch], batch_size=2)
+    job.start()
+    job._thread.join(5)
+    assert job.status == "done"
+    assert job.results == [0, 2, 4, 6, 8]
+
+
+def test_cancel_stops_after_current_batch_and_resume_continues():
+    job = gated_job(range(4))
+    job.start()
+    assert job.entered.wait(5)
+    job.cancel()
+    assert job.cancelling
+    job.gate.set()
+    job._thread.join(5)
+    assert job.status == "cancelled"
+    assert job.results == [0]
+
+    job.resume()
+    job._thread.join(5)
+    assert job.status == "done"
+    assert job.results == [0, 2, 4, 6]
+
+
+def test_resume_while_cancelling_keeps_the_job_running():
+    job = gated_job(range(3))
+    job.start()
+    assert job.entered.wait(5)
+    job.cancel()
+    job.resume()
+    assert not job.cancelling
+    job.gate.set()
+    job._thread.join(5)
+    assert job.status == "done"
+    assert job.results == [0, 2, 4]
+
+
+def test_failed_batch_can_be_resumed():
+    calls = []
+
+    def fn(batch, log):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise RuntimeError("quota")
+        return batch
+
+    job = Job("test", range(3), fn)
+    job.start()
+    job._thread.join(5)
+    assert (job.status, job.error, job.results) == ("failed", "quota", [0])
+    job.resume()
+    job._thread.join(5)
+    assert job.status == "done"
+    assert job.results == [0, 1, 2]
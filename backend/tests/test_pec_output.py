@@ -0,0 +1,71 @@
+import pandas as pd
+
+import pec_output
+import pec_render
+from pec_output import OUTPUT_HEADERS, plan_upsert, prepare_upsert
+
+
+class FakeOutputSheet:
+    def __init__(self, rows):
+        self.rows = [list(r) for r in rows]
+        self.cleared = False
+
+    def batch_get(self, ranges):
+        header = [self.rows[0]] if self.rows else []
+        return [header, [r[2:4] for r in self.rows[1:]]]
+
+    def clear(self):
+        self.cleared = True
+        self.rows = []
+
+
+def test_plan_sorts_new_changed_and_unchanged_rows():
+    index = {"k1": (2, "h1"), "k2": (3, "h2")}
+    rows = [["A", "pec a", "k1", "h1"], ["B", "pec b v2", "k2", "h2b"], ["C", "pec c", "k3", "h3"]]
+
+    appends, cells, unchanged = plan_upsert(rows, index)
+
+    assert appends == [["C", "pec c", "k3", "h3"]]
+    assert cells == [(3, 2, "pec b v2"), (3, 4, "h2b")]
+    assert unchanged == 1
+
+
+def test_repeated_lead_keys_keep_a_row_each():
+    rows = [["A", "pec 1", "k", "h1"], ["A", "pec 2", "k", "h2"], ["A", "pec 3", "k", "h3"]]
+
+    appends, cells, unchanged = plan_upsert(rows, {})
+
+    assert [r[2] for r in appends] == ["k", "k#2", "k#3"]
+    assert [r[1] for r in appends] == ["pec 1", "pec 2", "pec 3"]
+
+    # the next run finds all three again
+    index = {r[2]: (i + 2, r[3]) for i, r in enumerate(appends)}
+    assert plan_upsert(rows, index) == ([], [], 3)
+
+
+def test_empty_and_legacy_sheets_get_the_header():
+    rows = [["A", "pec a", "k1", "h1"]]
+    empty = FakeOutputSheet([])
+    appends, cells, stats = prepare_upsert(empty, rows)
+    assert appends == [OUTPUT_HEADERS, rows[0]]
+    assert stats == {"appended": 1, "updated": 0, "unchanged": 0}
+    assert not empty.cleared
+
+    legacy = FakeOutputSheet([["Name", "Generated PEC"], ["A", "old pec"]])
+    appends, _, _ = prepare_upsert(legacy, rows)
+    assert legacy.cleared
+    assert appends == [OUTPUT_HEADERS, rows[0]]
+
+
+def test_rows_from_rendered_leads():
+    df = pd.DataFrame({"Name": ["A", "A", "B"], "IG": ["@a", "@a", "@b"], "FB": ["", "", ""],
+                       "Event": ["Fest", "Fest", "Club"], "Date": ["", "", ""], "Tag": ["", "", ""],
+                       "Status": ["", "", ""]})
+    keys = pec_render.lead_keys(df)
+    out = pd.DataFrame({"Name": df["Name"], "Generated PEC": ["p1", "p2", "p3"]})
+
+    rows = pec_output.output_rows(out, keys, pd.Series(["h1", "h2", "h3"]))
+    appends, _, _ = plan_upsert(rows, {})
+
+    assert len(appends) == 3
+    assert len({r[2] for r in appends}) == 3
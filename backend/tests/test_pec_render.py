@@ -0,0 +1,70 @@
+import random
+
+import pandas as pd
+
+import pec_render
+from bulk_pec_generator import templates
+
+CONFIG = {"your_name": "Girinath", "city": "Chennai", "brand": "BlakShyft", "portfolio": "https://example.com"}
+HEADERS = ["Name", "IG", "FB", "Email", "Tag", "Status", "Event", "Venue", "Date", "Timestamp"]
+
+
+def legacy_render(rows, templates, config):
+    """The original per-row loop of generate_bulk_messages: [(sheet row, name, message)]."""
+    col_map = {key: HEADERS.index(key) for key in HEADERS}
+    out = []
+    for idx, row in enumerate(rows, start=2):
+        if row[col_map["Status"]].strip().lower() in ["sent", "replied"]:
+            continue
+        tag = row[col_map["Tag"]].strip()
+        if tag not in templates:
+            continue
+        data = dict(config, artist_name=row[col_map["Name"]], event=row[col_map["Event"]],
+                    venue=row[col_map["Venue"]], date=row[col_map["Date"]])
+        out.append((idx, row[col_map["Name"]], templates[tag].format(**data)))
+    return out
+
+
+def sheet_rows(n, seed=0):
+    rnd = random.Random(seed)
+    tags = list(templates) + [" artist_bad ", "unknown_tag", ""]
+    statuses = ["", "Sent", " sent ", "REPLIED", "pending"]
+    return [[rnd.choice([f"Lead {i}", "Dj {i} ✨", ""]), "", "", "", rnd.choice(tags), rnd.choice(statuses),
+             f"Event {i % 7}", f"Venue {{x}} {i % 3}", f"2025-01-{1 + i % 28:02d}", ""] for i in range(n)]
+
+
+def vectorized(rows, templates, config):
+    df = pd.DataFrame(rows, columns=HEADERS)
+    out = pec_render.render_pecs(df, templates, config)
+    return [(idx + 2, name, message) for idx, name, message in zip(out.index, out["Name"], out["Generated PEC"])]
+
+
+def test_matches_the_per_row_loop():
+    rows = sheet_rows(500)
+    expected = legacy_render(rows, templates, CONFIG)
+    assert len(expected) > 100
+    assert vectorized(rows, templates, CONFIG) == expected
+
+
+def test_templates_with_format_specs_fall_back_to_str_format():
+    special = {"artist_bad": "Hi {artist_name!r}, {event:>12}|{your_name}", "venue_good": "{{literal}} {venue}"}
+    rows = sheet_rows(200, seed=1)
+    assert vectorized(rows, special, CONFIG) == legacy_render(rows, special, CONFIG)
+
+
+def test_content_hash_ignores_fields_the_template_does_not_use():
+    tmpl = {"artist_bad": "Hi {artist_name} at {event}"}
+    df = pd.DataFrame([["A", "", "", "", "artist_bad", "", "Fest", "Club", "2025-01-01", ""]], columns=HEADERS)
+    before = pec_render.content_hashes(df, tmpl, CONFIG)
+
+    df.loc[0, "Venue"] = "Other club"
+    assert pec_render.content_hashes(df, tmpl, CONFIG).equals(before)
+    df.loc[0, "Event"] = "Other fest"
+    assert not pec_render.content_hashes(df, tmpl, CONFIG).equals(before)
+    assert not pec_render.content_hashes(df, {"artist_bad": "Hey {artist_name}"}, CONFIG).equals(before)
+
+
+def test_lead_keys_ignore_case_and_whitespace():
+    df = pd.DataFrame({"Name": ["DJ Foo", " dj foo "], "IG": ["@foo", "@FOO"], "Event": ["Fest", "fest"]})
+    keys = pec_render.lead_keys(df)
+    assert keys.iloc[0] == keys.iloc[1]
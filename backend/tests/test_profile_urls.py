@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+
+import email_scraper_v2 as es
+from profile_urls import canonicalize_fb_url, canonicalize_ig_url, fb_about_url
+
+
+@pytest.mark.parametrize("url", ["http://instagram.com/DJ.Foo?igshid=abc", "https://www.instagram.com/dj.foo",
+                                 "m.instagram.com/dj.foo/", "@DJ.Foo"])
+def test_ig_variants_share_one_url(url):
+    assert canonicalize_ig_url(url) == "https://www.instagram.com/dj.foo/"
+
+
+@pytest.mark.parametrize("url", ["https://m.facebook.com/TheVenue/about/", "http://facebook.com/thevenue?ref=br",
+                                 "www.facebook.com/TheVenue/about_contact_and_basic_info"])
+def test_fb_variants_share_one_url(url):
+    assert canonicalize_fb_url(url) == "https://www.facebook.com/thevenue"
+
+
+def test_fb_numeric_profile_keeps_only_id():
+    url = canonicalize_fb_url("https://m.facebook.com/profile.php?id=1000123&refid=17&__tn__=C")
+    assert url == "https://www.facebook.com/profile.php?id=1000123"
+
+
+@pytest.mark.parametrize("value", [None, float("nan"), "", "   "])
+def test_blank_values(value):
+    assert canonicalize_ig_url(value) is None
+    assert canonicalize_fb_url(value) is None
+
+
+@pytest.mark.parametrize("url, about", [
+    ("https://www.facebook.com/thevenue", "https://www.facebook.com/thevenue/about"),
+    ("https://www.facebook.com/thevenue/", "https://www.facebook.com/thevenue/about"),
+    ("https://www.facebook.com/thevenue/about", "https://www.facebook.com/thevenue/about"),
+    ("https://www.facebook.com/profile.php?id=1000123", "https://www.facebook.com/profile.php?id=1000123&sk=about"),
+    ("https://www.facebook.com/profile.php?id=1000123&sk=about",
+     "https://www.facebook.com/profile.php?id=1000123&sk=about"),
+])
+def test_fb_about_url(url, about):
+    assert fb_about_url(url) == about
+
+
+def test_http_scrape_of_numeric_profile_fetches_about_tab():
+    lead = canonicalize_fb_url("facebook.com/profile.php?id=1000123&ref=bookmarks")
+    fetched = []
+
+    class Client:
+        def get(self, url, **kwargs):
+            fetched.append(url)
+            html = "<html><p>" + "x " * 1500 + "booking@venue.com</p></html>"
+            return SimpleNamespace(status_code=200, url=url, text=html, raise_for_status=lambda: None)
+
+    emails = es.scrape_facebook_about_http(lead, cookies={}, client=Client())
+
+    assert fetched == ["https://www.facebook.com/profile.php?id=1000123&sk=about"]
+    assert emails == ["booking@venue.com"]
@@ -0,0 +1,38 @@
+import pandas as pd
+
+import email_scraper_v2 as es
+import scrape_core
+
+
+def fake_bio(url, timeout=10, cache=None, client=None, warn=None):
+    handle = url.rstrip("/").rsplit("/", 1)[-1]
+    return [f"{handle}@example.com"] if handle != "nobody" else []
+
+
+def write_leads(path, igs):
+    pd.DataFrame({"Name": [f"Lead {i}" for i in range(len(igs))], "IG": igs,
+                  "Email": [""] * len(igs)}).to_csv(path, index=False)
+
+
+def test_all_blank_email_column(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape_core, "scrape_instagram_bio", fake_bio)
+    path = tmp_path / "in.csv"
+    write_leads(path, ["https://instagram.com/alice", "https://instagram.com/nobody"])
+    df = pd.read_csv(path)
+    assert df["Email"].dtype == "float64"
+
+    out, stats = es.run_on_dataframe(df, verbose=False)
+
+    assert out["Email"].tolist()[0] == "alice@example.com"
+    assert stats["found_ig"] == 1
+
+
+def test_streaming_chunk_with_blank_emails(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape_core, "scrape_instagram_bio", fake_bio)
+    src, dst = tmp_path / "in.csv", tmp_path / "out.csv"
+    write_leads(src, [f"https://instagram.com/user{i}" for i in range(7)])
+
+    stats = es.run_streaming(str(src), str(dst), 3, verbose=False)
+
+    assert stats["rows"] == 7
+    assert pd.read_csv(dst)["Email"].tolist() == [f"user{i}@example.com" for i in range(7)]
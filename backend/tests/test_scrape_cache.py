@@ -0,0 +1,90 @@
+import pytest
+import requests
+
+import scrape_cache
+import scrape_core
+from scrape_cache import ScrapeCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache module."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(scrape_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_hit_until_ttl_then_miss(tmp_path, clock):
+    cache = ScrapeCache(str(tmp_path / "c.sqlite"), ttl=100, negative_ttl=10)
+    cache.put("ig", "https://www.instagram.com/dj/", ["dj@example.com"])
+
+    clock[0] += 100
+    assert cache.get("ig", "https://www.instagram.com/dj/") == ["dj@example.com"]
+    clock[0] += 1
+    assert cache.get("ig", "https://www.instagram.com/dj/") is None
+    assert cache.stats() == {"cache_hits": 1, "cache_misses": 1}
+
+
+def test_negative_entries_use_the_shorter_ttl(tmp_path, clock):
+    cache = ScrapeCache(str(tmp_path / "c.sqlite"), ttl=100, negative_ttl=10)
+    cache.put("ig", "https://www.instagram.com/nobody/", [])
+
+    clock[0] += 10
+    assert cache.get("ig", "https://www.instagram.com/nobody/") == []
+    clock[0] += 1
+    assert cache.get("ig", "https://www.instagram.com/nobody/") is None
+
+
+def test_sources_are_separate_and_entries_persist(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    ScrapeCache(path).put("fb", "https://www.facebook.com/venue", ["a@b.com"])
+
+    cache = ScrapeCache(path)
+    assert cache.get("fb", "https://www.facebook.com/venue") == ["a@b.com"]
+    assert cache.get("ig", "https://www.facebook.com/venue") is None
+
+
+def test_eviction_keeps_the_newest_entries(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(scrape_cache, "_EVICT_EVERY", 5)
+    cache = ScrapeCache(str(tmp_path / "c.sqlite"), max_entries=3)
+    for i in range(5):
+        clock[0] += 1
+        cache.put("ig", f"u{i}", [f"{i}@x.com"])
+
+    assert [cache.get("ig", f"u{i}") is not None for i in range(5)] == [False, False, True, True, True]
+
+
+class Response:
+    def __init__(self, status):
+        self.status_code = status
+
+
+class NotFoundClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        raise requests.HTTPError("404", response=Response(404))
+
+
+class BusyClient(NotFoundClient):
+    def get(self, url, **kwargs):
+        self.calls += 1
+        raise requests.HTTPError("503", response=Response(503))
+
+
+def test_missing_profile_is_cached_as_negative(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "c.sqlite"))
+    client = NotFoundClient()
+    for _ in range(3):
+        assert scrape_core.scrape_instagram_bio("https://www.instagram.com/gone/", cache=cache, client=client) == []
+    assert client.calls == 1
+
+
+def test_transient_errors_are_not_cached(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "c.sqlite"))
+    client = BusyClient()
+    for _ in range(2):
+        assert scrape_core.scrape_instagram_bio("https://www.instagram.com/busy/", cache=cache, client=client) == []
+    assert client.calls == 2
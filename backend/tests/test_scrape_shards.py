@@ -0,0 +1,44 @@
+import pandas as pd
+
+import benchmark
+import email_scraper_v2 as es
+from scrape_shards import run_sharded, shard_assignments
+
+
+def leads(igs, fbs=None):
+    return pd.DataFrame({"Name": [f"Lead {i}" for i in range(len(igs))], "IG": igs,
+                         "FB": fbs if fbs is not None else [""] * len(igs)})
+
+
+def test_same_profile_shares_a_shard():
+    df = leads(["https://instagram.com/DJ.Foo", "@dj.foo", "http://www.instagram.com/dj.foo/?igshid=1", "", ""],
+               ["", "", "", "https://m.facebook.com/TheVenue/about", "facebook.com/thevenue"])
+    for shards in (2, 3, 7):
+        got = shard_assignments(df, shards)
+        assert len(set(got[:3])) == 1
+        assert got[3] == got[4]
+        assert all(0 <= s < shards for s in got)
+
+
+def test_assignments_do_not_depend_on_row_order():
+    df = leads([f"https://instagram.com/user{i}" for i in range(50)])
+    forward = dict(zip(df["IG"], shard_assignments(df, 4)))
+    backward = df.iloc[::-1].reset_index(drop=True)
+    assert dict(zip(backward["IG"], shard_assignments(backward, 4))) == forward
+    assert len(set(forward.values())) == 4
+
+
+def test_sharded_output_keeps_input_order(tmp_path):
+    # the fake IG/FB server runs in this process; the shard processes reach it over HTTP
+    services = benchmark.FakeServices(latency=0, page_size=4096).start()
+    try:
+        path = benchmark.write_leads(str(tmp_path / "leads.csv"), 60, services.base_url)
+        single, _ = es.run_on_dataframe(pd.read_csv(path), concurrency=4, verbose=False)
+        sharded, stats = run_sharded(path, 3, concurrency=4)
+    finally:
+        services.stop()
+
+    assert stats["shards"] == 3
+    assert stats["rows"] == 60
+    assert sharded["Name"].tolist() == single["Name"].tolist()
+    assert sharded["Email"].fillna("").tolist() == single["Email"].fillna("").tolist()
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+import scrape_core
+import scrape_worker
+from scrape_worker import JobCancelled, JobQueue, ScrapeWorker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite"))
+    yield q
+    q.close()
+
+
+def fake_bio(url, timeout=10, cache=None, client=None, warn=None):
+    return [url.rstrip("/").rsplit("/", 1)[-1] + "@example.com"]
+
+
+def test_jobs_are_claimed_oldest_first(queue, tmp_path):
+    first = queue.submit("csv", tmp_path / "a.csv", options={"chunksize": 10})
+    second = queue.submit("sheet", scrape_worker.sheet_source(start_row=5, end_row=9))
+
+    job = queue.claim()
+    assert (job["id"], job["kind"], job["attempts"]) == (first, "csv", 1)
+    assert job["options"] == {"chunksize": 10}
+    assert queue.get(first)["status"] == "running"
+    assert queue.claim()["id"] == second
+    assert queue.claim() is None
+
+
+def test_progress_finish_and_fail(queue):
+    a, b = queue.submit("csv", "a.csv"), queue.submit("csv", "b.csv")
+    queue.claim()
+    queue.progress(a, 50, {"found_ig": 3}, rows_total=100)
+    assert (queue.get(a)["rows_done"], queue.get(a)["rows_total"]) == (50, 100)
+    queue.finish(a, {"found_ig": 7})
+    queue.claim()
+    queue.fail(b, "ValueError: bad file")
+
+    done, failed = queue.get(a), queue.get(b)
+    assert (done["status"], done["stats"]) == ("done", {"found_ig": 7})
+    assert (failed["status"], failed["error"]) == ("failed", "ValueError: bad file")
+    assert [j["id"] for j in queue.list()] == [b, a]
+
+
+def test_cancel_queued_and_running_jobs(queue):
+    running, waiting = queue.submit("csv", "a.csv"), queue.submit("csv", "b.csv")
+    queue.claim()
+
+    assert queue.cancel(waiting) == "cancelled"
+    assert queue.cancel(running) == "cancelling"
+    with pytest.raises(JobCancelled):
+        queue.progress(running, 10, {})
+    assert queue.claim() is None
+
+
+def test_jobs_of_a_dead_worker_are_requeued(queue, monkeypatch):
+    running, cancelling = queue.submit("csv", "a.csv"), queue.submit("csv", "b.csv")
+    queue.claim()
+    queue.claim()
+    queue.cancel(cancelling)
+    monkeypatch.setattr(scrape_worker, "_pid_alive", lambda pid: False)
+
+    assert queue.requeue_stale() == [running]
+    assert queue.get(cancelling)["status"] == "cancelled"
+    assert queue.claim()["attempts"] == 2
+
+
+def test_worker_runs_a_csv_job(queue, tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape_core, "scrape_instagram_bio", fake_bio)
+    src, out = tmp_path / "leads.csv", tmp_path / "out.csv"
+    pd.DataFrame({"Name": [f"Lead {i}" for i in range(7)],
+                  "IG": [f"https://instagram.com/user{i}" for i in range(7)]}).to_csv(src, index=False)
+    job_id = queue.submit("csv", src, output=out, options={"chunksize": 3})
+
+    ScrapeWorker(queue, concurrency=2).serve(once=True)
+
+    job = queue.get(job_id)
+    assert (job["status"], job["rows_done"], job["rows_total"]) == ("done", 7, 7)
+    assert pd.read_csv(out)["Found Email"].tolist() == [f"user{i}@example.com" for i in range(7)]
@@ -0,0 +1,87 @@
+import re
+
+from sheet_mirror import SheetMirror
+
+
+class FakeWorksheet:
+    """Just the gspread calls SheetMirror makes; .calls counts them."""
+    spreadsheet_id = "sheet-id"
+    title = "OutreachLeads"
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def row_values(self, row):
+        self.calls.append("row_values")
+        return list(self.rows[row - 1])
+
+    def get_all_values(self):
+        self.calls.append("get_all_values")
+        return [list(r) for r in self.rows]
+
+    def batch_get(self, ranges, major_dimension="ROWS"):
+        self.calls.append("batch_get")
+        out = []
+        for a1 in ranges:
+            start_col, start, end_col, end = re.match(r"([A-Z]+)(\d+):([A-Z]+)(\d*)", a1).groups()
+            first, last = ord(start_col) - 65, ord(end_col) - 65
+            block = [r[first:last + 1] for r in self.rows[int(start) - 1:int(end) if end else None]]
+            out.append([list(c) for c in zip(*block)] if major_dimension == "COLUMNS" else block)
+        return out
+
+
+def leads(n, modified=True):
+    header = ["Name", "Email"] + (["Last Modified"] if modified else [])
+    return [header] + [[f"Lead {i}", ""] + (["t0"] if modified else []) for i in range(n)]
+
+
+def test_incremental_sync_fetches_only_changed_rows(tmp_path):
+    mirror = SheetMirror(str(tmp_path / "m.sqlite"))
+    ws = FakeWorksheet(leads(50))
+    values, stats = mirror.read(ws)
+    assert stats["mode"] == "full"
+    assert values == ws.rows
+
+    ws.rows[10][1], ws.rows[10][2] = "a@b.com", "t1"
+    ws.calls.clear()
+    values, stats = mirror.read(ws)
+
+    assert stats["mode"] == "incremental"
+    assert stats["changed_rows"] == [11]
+    assert ws.calls == ["row_values", "batch_get", "batch_get"]
+    assert values == ws.rows
+
+
+def test_sheet_without_modified_column_is_read_directly(tmp_path, capsys):
+    mirror = SheetMirror(str(tmp_path / "m.sqlite"))
+    ws = FakeWorksheet(leads(20, modified=False))
+    values, stats = mirror.read(ws)
+    assert stats["mode"] == "direct"
+    assert values == ws.rows
+    assert "direct sync" in capsys.readouterr().out
+
+    ws.rows[3][1] = "x@y.com"
+    ws.calls.clear()
+    values, stats = mirror.read(ws)
+    assert ws.calls == ["get_all_values"]   # same cost as reading without a mirror
+    assert values[3][1] == "x@y.com"
+    assert mirror.values(stats["sheet"]) == [ws.rows[0]]   # rows are not stored
+
+
+def test_adding_modified_column_switches_to_the_mirror(tmp_path):
+    mirror = SheetMirror(str(tmp_path / "m.sqlite"))
+    ws = FakeWorksheet(leads(5, modified=False))
+    assert mirror.read(ws)[1]["mode"] == "direct"
+
+    ws.rows = leads(5)
+    assert mirror.read(ws)[1]["mode"] == "full"
+    assert mirror.read(ws)[1]["mode"] == "incremental"
+
+
+def test_set_cells_updates_mirrored_rows(tmp_path):
+    mirror = SheetMirror(str(tmp_path / "m.sqlite"))
+    ws = FakeWorksheet(leads(3))
+    _, stats = mirror.read(ws)
+    mirror.set_cells(stats["sheet"], [(2, 2, "found@x.com")])
+    assert mirror.values(stats["sheet"])[1] == ["Lead 0", "found@x.com", "t0"]
@@ -0,0 +1,84 @@
+import pytest
+
+import sheets_batch
+from sheets_batch import SheetsBatchWriter, call_with_quota_retry, rowcol_to_a1
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.calls = []
+
+    def append_rows(self, rows, value_input_option=None):
+        self.calls.append(("append_rows", len(rows), value_input_option))
+
+    def batch_update(self, data, value_input_option=None):
+        self.calls.append(("batch_update", [d["range"] for d in data], value_input_option))
+
+
+class QuotaError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Response", (), {"status_code": status})()
+
+
+@pytest.mark.parametrize("row, col, a1", [(1, 1, "A1"), (2, 26, "Z2"), (2, 28, "AB2"), (10, 703, "AAA10")])
+def test_rowcol_to_a1(row, col, a1):
+    assert rowcol_to_a1(row, col) == a1
+
+
+def test_rows_go_out_in_batches():
+    ws = FakeWorksheet()
+    writer = SheetsBatchWriter(batch_size=4)
+    for i in range(10):
+        writer.append_row(ws, [f"Lead {i}", "pec"])
+    writer.flush()
+
+    assert ws.calls == [("append_rows", 4, "RAW"), ("append_rows", 4, "RAW"), ("append_rows", 2, "RAW")]
+    assert writer.api_calls == 3
+
+
+def test_cells_are_user_entered_and_flushed_after_rows():
+    ws = FakeWorksheet()
+    with SheetsBatchWriter(batch_size=100) as writer:
+        writer.update_cell(ws, 2, 6, "Sent")
+        writer.update_cell(ws, 2, 10, "2025-01-01 10:00:00")
+        writer.append_row(ws, ["Lead", "pec"])
+
+    assert ws.calls == [("append_rows", 1, "RAW"), ("batch_update", ["F2", "J2"], "USER_ENTERED")]
+
+
+def test_worksheets_are_batched_separately():
+    a, b = FakeWorksheet(), FakeWorksheet()
+    writer = SheetsBatchWriter()
+    writer.update_cell(a, 2, 1, "x")
+    writer.update_cell(b, 3, 1, "y")
+    writer.flush()
+    assert a.calls == [("batch_update", ["A2"], "USER_ENTERED")]
+    assert b.calls == [("batch_update", ["A3"], "USER_ENTERED")]
+
+
+def test_quota_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(sheets_batch.time, "sleep", lambda seconds: None)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise QuotaError(429)
+        return "ok"
+
+    assert call_with_quota_retry(flaky) == "ok"
+    assert len(attempts) == 3
+
+
+def test_other_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(sheets_batch.time, "sleep", lambda seconds: None)
+    attempts = []
+
+    def bad_range():
+        attempts.append(1)
+        raise QuotaError(400)
+
+    with pytest.raises(QuotaError):
+        call_with_quota_retry(bad_range)
+    assert len(attempts) == 1